@@ -13,16 +13,34 @@
 ##############################################################################
 """Pluggable Authentication Utility implementation
 """
+import copy
+import hashlib
+import hmac
+import os
+import time
 
 import zope.interface
+import zope.security.management
+from zope.authentication.interfaces import IAuthentication
+from zope.authentication.interfaces import PrincipalLookupError
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+from zope.lifecycleevent.interfaces import IObjectRemovedEvent
 from zope.location.interfaces import ILocation
 # BBB using zope.pluggableauth
 from zope.pluggableauth import PluggableAuthentication  # noqa: F401 BBB
 from zope.pluggableauth.interfaces import IPluggableAuthentication
 from zope.pluggableauth.interfaces import IQueriableAuthenticator
+from zope.publisher.interfaces import IEndRequestEvent
+from zope.publisher.interfaces import IRequest
 
 from zope import component
 from zope.app.authentication import interfaces
+from zope.app.authentication.cache import LRUCache
+from zope.app.authentication.groupfolder import IGroupInformation
+from zope.app.authentication.instrumentation import PluginStatistics
+from zope.app.authentication.principalfolder import IInternalPrincipal
+from zope.app.authentication.principalfolder import principalFolder
 
 
 @component.adapter(
@@ -38,8 +56,13 @@ class QuerySchemaSearchAdapter:
     Delegates the search to the adapted authenticator (which also provides
     IQuerySchemaSearch) and prepends the PAU prefix to the resulting principal
     IDs.
+
+    If the PAU records plugin statistics, searches are recorded under
+    `pluginName`, the name the plugin is configured with in the PAU.
     """
 
+    pluginName = None
+
     def __init__(self, authplugin, pau):
         if (ILocation.providedBy(authplugin) and
                 authplugin.__parent__ is not None):
@@ -54,7 +77,619 @@ class QuerySchemaSearchAdapter:
         self.authplugin = authplugin
         self.pau = pau
         self.schema = authplugin.schema
+        if interfaces.IBatchedQuerySchemaSearch.providedBy(authplugin):
+            zope.interface.alsoProvides(
+                self, interfaces.IBatchedQuerySchemaSearch)
 
     def search(self, query, start=None, batch_size=None):
-        for id in self.authplugin.search(query, start, batch_size):
-            yield self.pau.prefix + id
+        result = QuerySchemaSearchResult(
+            self.authplugin, self.pau.prefix, query, start, batch_size)
+        getStatistics = getattr(self.pau, 'getPluginStatistics', None)
+        if getStatistics is not None:
+            result.statistics = getStatistics()
+            result.name = self.pluginName
+            if result.name is None:
+                result.name = configuredPluginName(self.pau, self.authplugin)
+        return result
+
+    def count(self, query):
+        """Return the number of principals matching `query`.
+
+        Plugins that can't count are counted by iterating their search.
+        """
+        return QuerySchemaSearchResult(
+            self.authplugin, self.pau.prefix, query).total
+
+
+def configuredPluginName(pau, authplugin):
+    """Return the name an authenticator plugin is configured with in a PAU.
+
+    None is returned if the PAU doesn't use the plugin.
+    """
+    for name, plugin in pau.getAuthenticatorPlugins():
+        if plugin is authplugin:
+            return name
+    return None
+
+
+class QuerySchemaSearchResult:
+    """A lazy batch of the principal ids found by a schema search.
+
+    The search is delegated to the plugin only when the result is iterated,
+    and the PAU prefix is prepended to each id as it is produced, so a page
+    of a large result set never requires the full list of ids.
+
+    `start` and `batch_size` are passed on to the plugin unchanged.  The
+    result isn't sized, so that iterating it never counts the matches;
+    `total`, the number of matches regardless of the batch, is only
+    computed when asked for: from the plugin's `count` if it provides
+    `IBatchedQuerySchemaSearch`, otherwise by counting (not storing) the
+    matches.
+
+    If `statistics` is set, the time it takes the plugin to produce the
+    batch is recorded under `name`.
+    """
+
+    statistics = None
+    name = None
+
+    def __init__(self, authplugin, prefix, query, start=None, batch_size=None):
+        self.authplugin = authplugin
+        self.prefix = prefix
+        self.query = query
+        self.start = start
+        self.batch_size = batch_size
+        self._total = None
+
+    def __iter__(self):
+        prefix = self.prefix
+        if self.statistics is not None:
+            yield from self._timedSearch()
+            return
+        for id in self.authplugin.search(
+                self.query, self.start, self.batch_size):
+            yield prefix + id
+
+    def _timedSearch(self):
+        # Only the time spent in the plugin is recorded, not the time spent
+        # by the consumer between ids.
+        prefix = self.prefix
+        seconds = 0.0
+        found = error = False
+        started = time.perf_counter()
+        try:
+            ids = iter(self.authplugin.search(
+                self.query, self.start, self.batch_size))
+            while True:
+                try:
+                    id = next(ids)
+                except StopIteration:
+                    break
+                seconds += time.perf_counter() - started
+                found = True
+                yield prefix + id
+                started = time.perf_counter()
+        except Exception:
+            error = True
+            raise
+        finally:
+            seconds += time.perf_counter() - started
+            self.statistics.record(self.name, 'search', seconds, found, error)
+
+    @property
+    def total(self):
+        if self._total is None:
+            if interfaces.IBatchedQuerySchemaSearch.providedBy(
+                    self.authplugin):
+                self._total = self.authplugin.count(self.query)
+            else:
+                self._total = sum(1 for id in self.authplugin.search(
+                    self.query))
+        return self._total
+
+
+REQUEST_CACHE_KEY = 'zope.app.authentication.principals'
+
+# The credentials a principal was authenticated with, kept in the request's
+# annotations while the principal is created.
+CREDENTIALS_KEY = 'zope.app.authentication.credentials'
+
+# The credentials caches of the caching PAUs, by PAU.  The caches are shared
+# by all the connections (and thus threads) using a PAU.
+_credentialsCaches = {}
+
+# The plugin statistics of the caching PAUs recording them, by PAU.
+_pluginStatistics = {}
+
+# The negative caches of the caching PAUs: principal id -> names of the
+# authenticator plugins that don't know the principal.
+_negativeCaches = {}
+
+# Recorded in the negative cache, with the names of the plugins, when no
+# plugin and no next authentication utility knows a principal.
+UNKNOWN = ''
+
+# How often plugins found principals, by PAU, kind of lookup and pattern of
+# the id or login looked up.
+_pluginHits = {}
+
+# Counts of plugin hits are halved when one of them reaches this, so that
+# the order adapts to changes.
+MAX_PLUGIN_HITS = 1000
+
+# Credentials are only kept as digests keyed with a secret that doesn't
+# outlive the process.
+_digestKey = os.urandom(32)
+
+
+def credentialsDigest(pluginName, credentials):
+    """Return a digest of credentials extracted by a credentials plugin.
+
+    None is returned for credentials that can't be digested:
+
+      >>> print(credentialsDigest('plugin', object()))
+      None
+
+    Credentials are digested by value:
+
+      >>> digest = credentialsDigest(
+      ...     'plugin', {'login': 'bob', 'password': 'secret'})
+      >>> digest == credentialsDigest(
+      ...     'plugin', {'password': 'secret', 'login': 'bob'})
+      True
+      >>> digest == credentialsDigest(
+      ...     'other', {'password': 'secret', 'login': 'bob'})
+      False
+
+    """
+    if isinstance(credentials, dict):
+        try:
+            value = sorted(credentials.items())
+        except TypeError:
+            return None
+    elif isinstance(credentials, (str, bytes)):
+        value = credentials
+    elif (callable(getattr(credentials, 'getLogin', None))
+          and callable(getattr(credentials, 'getPassword', None))):
+        value = credentials.getLogin(), credentials.getPassword()
+    else:
+        return None
+    return hmac.new(_digestKey, repr((pluginName, value)).encode('utf-8'),
+                    hashlib.sha256).digest()
+
+
+def passwordFingerprint(authplugin, info):
+    """Return a digest of the login and password of an authenticated principal.
+
+    None is returned unless the principal was authenticated by a principal
+    folder:
+
+      >>> from zope.app.authentication.principalfolder import PrincipalInfo
+      >>> info = PrincipalInfo('principals.bob', 'bob', 'Bob', '')
+      >>> print(passwordFingerprint(object(), info))
+      None
+
+    The digest changes with the principal's encoded password and with its
+    login, so credentials remembered for a login that was renamed no longer
+    match:
+
+      >>> from zope.app.authentication.principalfolder import (
+      ...     InternalPrincipal, PrincipalFolder)
+      >>> folder = PrincipalFolder('principals.')
+      >>> folder['bob'] = InternalPrincipal('bob', 'secret', 'Bob')
+      >>> fingerprint = passwordFingerprint(folder, info)
+      >>> fingerprint == passwordFingerprint(folder, info)
+      True
+      >>> folder['bob'].login = 'robert'
+      >>> fingerprint == passwordFingerprint(folder, info)
+      False
+      >>> folder['bob'].login = 'bob'
+      >>> fingerprint == passwordFingerprint(folder, info)
+      True
+      >>> folder['bob'].password = 'new secret'
+      >>> fingerprint == passwordFingerprint(folder, info)
+      False
+
+    """
+    folder = principalFolder(authplugin)
+    if folder is None or not info.id.startswith(folder.prefix):
+        return None
+    principal = folder.get(info.id[len(folder.prefix):])
+    if principal is None:
+        return None
+    value = (info.id, principal.login, principal.passwordManagerName,
+             principal.password)
+    return hmac.new(_digestKey, repr(value).encode('utf-8'),
+                    hashlib.sha256).digest()
+
+
+class PrincipalCache:
+    """The principals a PAU has found during one request."""
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self.principals = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, principal_ids):
+        """Forget the given principals, with or without the PAU prefix."""
+        prefix = self.prefix
+        for id in list(self.principals):
+            if id in principal_ids or (
+                    id.startswith(prefix)
+                    and id[len(prefix):] in principal_ids):
+                del self.principals[id]
+
+
+def idPattern(id):
+    """Return the pattern of a principal id, its first dotted segment.
+
+      >>> idPattern('principals.bob'), idPattern('bob')
+      ('principals.', '')
+
+    """
+    return id[:id.find('.') + 1]
+
+
+def getCurrentRequest():
+    """Return the request of the current interaction, if any."""
+    interaction = zope.security.management.queryInteraction()
+    if interaction is not None:
+        for participation in interaction.participations:
+            if IRequest.providedBy(participation):
+                return participation
+    return None
+
+
+@zope.interface.implementer(interfaces.ICachingPluggableAuthentication)
+class CachingPluggableAuthentication(PluggableAuthentication):
+    """A pluggable authentication utility that caches principals.
+
+    See caching.rst for details.
+    """
+
+    requestCache = True
+    credentialsCacheSize = 1000
+    credentialsCacheTimeout = 300
+    pluginStatistics = False
+    adaptivePluginOrder = False
+    negativeCacheSize = 1000
+    negativeCacheTimeout = 0
+
+    def getRequestCache(self, request=None):
+        """Return the principal cache for `request`.
+
+        The current request is used if no request is given.  None is
+        returned if request caching is disabled or if there is no request.
+        """
+        if not self.requestCache:
+            return None
+        if request is None:
+            request = getCurrentRequest()
+            if request is None:
+                return None
+        caches = request.annotations.setdefault(REQUEST_CACHE_KEY, {})
+        cache = caches.get(id(self))
+        if cache is None:
+            cache = caches[id(self)] = PrincipalCache(self.prefix)
+        return cache
+
+    def _cacheKey(self):
+        jar = getattr(self, '_p_jar', None)
+        if jar is None or self._p_oid is None:
+            return id(self)
+        return jar.db().database_name, self._p_oid
+
+    def getCredentialsCache(self):
+        """Return the credentials cache of this PAU.
+
+        None is returned if the credentials cache is disabled.
+        """
+        size = self.credentialsCacheSize
+        timeout = self.credentialsCacheTimeout
+        if not size or not timeout:
+            return None
+        key = self._cacheKey()
+        cache = _credentialsCaches.get(key)
+        if (cache is None or cache.maxsize != size
+                or cache.timeout != timeout):
+            cache = _credentialsCaches[key] = LRUCache(size, timeout)
+        return cache
+
+    def getNegativeCache(self):
+        """Return the negative cache of this PAU.
+
+        The cache maps principal ids, without the prefix of the PAU, to the
+        names of the authenticator plugins that didn't know them, and to
+        `UNKNOWN` if the next authentication utilities didn't either.  None
+        is returned if the negative cache is disabled.
+        """
+        size = self.negativeCacheSize
+        timeout = self.negativeCacheTimeout
+        if not size or not timeout:
+            return None
+        key = self._cacheKey()
+        cache = _negativeCaches.get(key)
+        if (cache is None or cache.maxsize != size
+                or cache.timeout != timeout):
+            cache = _negativeCaches[key] = LRUCache(size, timeout)
+        return cache
+
+    def _pluginHits(self):
+        key = self._cacheKey()
+        hits = _pluginHits.get(key)
+        if hits is None:
+            hits = _pluginHits.setdefault(key, LRUCache(timeout=None))
+        return hits
+
+    def orderPlugins(self, plugins, kind, pattern):
+        """Order (name, plugin) pairs by how often they found principals.
+
+        Only the principals looked up in the same `kind` of lookup whose id
+        had the same `pattern` are counted.  Plugins that found
+        the same number of principals stay in the configured order.
+        """
+        counts = self._pluginHits().get((kind, pattern))
+        if not counts:
+            return plugins
+        return sorted(plugins, key=lambda item: -counts.get(item[0], 0))
+
+    def recordPluginHit(self, kind, pattern, name):
+        """Count that plugin `name` found a principal."""
+        hits = self._pluginHits()
+        counts = hits.get((kind, pattern))
+        if counts is None:
+            counts = {}
+            hits.set((kind, pattern), counts)
+        # Counts are updated without locking; they only need to be about
+        # right.
+        count = counts[name] = counts.get(name, 0) + 1
+        if count >= MAX_PLUGIN_HITS:
+            for other in list(counts):
+                counts[other] //= 2
+
+    def getQueriables(self):
+        for name, queriable in super().getQueriables():
+            if isinstance(queriable, QuerySchemaSearchAdapter):
+                queriable.pluginName = name
+            yield name, queriable
+
+    def getPluginStatistics(self):
+        """Return the statistics of the calls of the plugins of this PAU.
+
+        None is returned if the statistics aren't recorded.
+        """
+        if not self.pluginStatistics:
+            return None
+        key = self._cacheKey()
+        stats = _pluginStatistics.get(key)
+        if stats is None:
+            stats = _pluginStatistics.setdefault(key, PluginStatistics())
+        return stats
+
+    def _callPlugin(self, stats, name, plugin, method, *args):
+        if stats is None:
+            return getattr(plugin, method)(*args)
+        started = time.perf_counter()
+        try:
+            result = getattr(plugin, method)(*args)
+        except Exception:
+            stats.record(name, method, time.perf_counter() - started, None,
+                         error=True)
+            raise
+        stats.record(name, method, time.perf_counter() - started,
+                     result is not None)
+        return result
+
+    def authenticate(self, request):
+        cache = self.getCredentialsCache()
+        stats = self.getPluginStatistics()
+        # Credentials are always authenticated in the configured order: the
+        # first plugin knowing a login is the one that logs it in.
+        authenticatorPlugins = list(self.getAuthenticatorPlugins())
+        for name, credplugin in self.getCredentialsPlugins():
+            credentials = self._callPlugin(
+                stats, name, credplugin, 'extractCredentials', request)
+            digest = None
+            if cache is not None:
+                digest = credentialsDigest(name, credentials)
+            if digest is not None:
+                cached = cache.get(digest)
+                if cached is not None:
+                    authname, info, principal_id, fingerprint = cached
+                    authplugin = dict(authenticatorPlugins).get(authname)
+                    if (authplugin is not None and fingerprint
+                            == passwordFingerprint(authplugin, info)):
+                        return self._authenticatedPrincipal(
+                            copy.copy(info), credplugin, authplugin,
+                            request, credentials)
+                    # The password was changed, or the plugin removed.
+                    cache.invalidate(digest)
+            for authname, authplugin in authenticatorPlugins:
+                info = self._callPlugin(
+                    stats, authname, authplugin, 'authenticateCredentials',
+                    credentials)
+                if info is None:
+                    continue
+                if digest is not None:
+                    # The cached info mustn't refer to the plugins, which
+                    # may be persistent objects of this request's
+                    # connection.
+                    cached = copy.copy(info)
+                    cached.credentialsPlugin = None
+                    cached.authenticatorPlugin = None
+                    cache.set(
+                        digest, (authname, cached, self.prefix + info.id,
+                                 passwordFingerprint(authplugin, info)))
+                return self._authenticatedPrincipal(
+                    info, credplugin, authplugin, request, credentials)
+        return None
+
+    def _authenticatedPrincipal(self, info, credplugin, authplugin, request,
+                                credentials):
+        info.credentialsPlugin = credplugin
+        info.authenticatorPlugin = authplugin
+        factory = component.getMultiAdapter(
+            (info, request), interfaces.IAuthenticatedPrincipalFactory)
+        # Subscribers to the event the factory sends may need the
+        # credentials, which must not be extracted again.
+        annotations = request.annotations
+        annotations[CREDENTIALS_KEY] = credentials
+        try:
+            principal = factory(self)
+        finally:
+            del annotations[CREDENTIALS_KEY]
+        principal.id = self.prefix + info.id
+        return principal
+
+    def getPrincipal(self, id):
+        cache = self.getRequestCache()
+        if cache is None:
+            return self._getPrincipal(id)
+        principal = cache.principals.get(id)
+        if principal is None:
+            cache.misses += 1
+            principal = cache.principals[id] = self._getPrincipal(id)
+        else:
+            cache.hits += 1
+        return principal
+
+    def _getPrincipal(self, id):
+        stats = self.getPluginStatistics()
+        misses = self.getNegativeCache()
+        adaptive = self.adaptivePluginOrder
+        if stats is None and misses is None and not adaptive:
+            return super().getPrincipal(id)
+        if not id.startswith(self.prefix):
+            next = component.queryNextUtility(self, IAuthentication)
+            if next is None:
+                raise PrincipalLookupError(id)
+            return next.getPrincipal(id)
+        id = id[len(self.prefix):]
+        plugins = list(self.getAuthenticatorPlugins())
+        if adaptive:
+            plugins = self.orderPlugins(plugins, 'id', idPattern(id))
+        missed = frozenset()
+        if misses is not None:
+            missed = misses.get(id, missed)
+        for name, authplugin in plugins:
+            if name in missed:
+                continue
+            info = self._callPlugin(
+                stats, name, authplugin, 'principalInfo', id)
+            if info is None:
+                if misses is not None:
+                    missed = missed | {name}
+                    misses.set(id, missed)
+                continue
+            if adaptive:
+                self.recordPluginHit('id', idPattern(id), name)
+            info.credentialsPlugin = None
+            info.authenticatorPlugin = authplugin
+            principal = interfaces.IFoundPrincipalFactory(info)(self)
+            principal.id = self.prefix + info.id
+            return principal
+        if UNKNOWN in missed:
+            # The next authentication utilities didn't know the principal
+            # either, last time they were asked.
+            raise PrincipalLookupError(id)
+        next = component.queryNextUtility(self, IAuthentication)
+        try:
+            if next is not None:
+                return next.getPrincipal(self.prefix + id)
+            raise PrincipalLookupError(id)
+        except PrincipalLookupError:
+            if misses is not None:
+                misses.set(id, missed | {UNKNOWN})
+            raise
+
+
+@component.adapter(IEndRequestEvent)
+def clearRequestCache(event):
+    """Forget the principals cached during a request."""
+    event.request.annotations.pop(REQUEST_CACHE_KEY, None)
+
+
+def invalidatePrincipals(principal_ids):
+    """Forget the cached credentials of the given principals.
+
+    The principals found during the current request are forgotten too.
+    The ids may be given with or without the prefix of the PAU.
+    """
+    principal_ids = set(principal_ids)
+    if not principal_ids:
+        return
+
+    request = getCurrentRequest()
+    if request is not None:
+        caches = request.annotations.get(REQUEST_CACHE_KEY, {})
+        for cache in caches.values():
+            cache.invalidate(principal_ids)
+
+    def authenticates(value):
+        authname, info, principal_id, fingerprint = value
+        return principal_id in principal_ids or info.id in principal_ids
+
+    for cache in list(_credentialsCaches.values()):
+        cache.invalidateValues(authenticates)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(_credentialsCaches.clear)
+    addCleanUp(_pluginStatistics.clear)
+    addCleanUp(_negativeCaches.clear)
+    addCleanUp(_pluginHits.clear)
+
+
+def forgetMisses(principal_ids):
+    """Forget that authenticator plugins didn't know the given principals.
+
+    The ids are given without the prefix of the PAU.
+    """
+    for cache in list(_negativeCaches.values()):
+        for principal_id in principal_ids:
+            cache.invalidate(principal_id)
+
+
+@component.adapter(IInternalPrincipal, IObjectMovedEvent)
+def forgetAddedPrincipal(principal, event):
+    folder = event.newParent
+    if folder is not None:
+        forgetMisses([getattr(folder, 'prefix', '') + event.newName])
+
+
+@component.adapter(IGroupInformation, IObjectMovedEvent)
+def forgetAddedGroup(group, event):
+    folder = event.newParent
+    if folder is not None:
+        forgetMisses([getattr(folder, 'prefix', '') + event.newName])
+
+
+@component.adapter(interfaces.IPrincipalsAddedToGroup)
+def invalidateGroupMembers(event):
+    invalidatePrincipals(event.principal_ids)
+
+
+@component.adapter(interfaces.IPrincipalsRemovedFromGroup)
+def invalidateFormerGroupMembers(event):
+    invalidatePrincipals(event.principal_ids)
+
+
+@component.adapter(IInternalPrincipal, IObjectModifiedEvent)
+def invalidateModifiedPrincipal(principal, event):
+    folder = principal.__parent__
+    if folder is not None:
+        invalidatePrincipals(
+            [getattr(folder, 'prefix', '') + principal.__name__])
+
+
+@component.adapter(IInternalPrincipal, IObjectRemovedEvent)
+def invalidateRemovedPrincipal(principal, event):
+    folder = event.oldParent
+    if folder is not None:
+        invalidatePrincipals([getattr(folder, 'prefix', '') + event.oldName])
@@ -0,0 +1,542 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Benchmarks of the authentication components
+
+They cover extracting credentials, authenticating them, resolving nested
+groups, searching principals, the granting and role-permission views and
+editing large group hierarchies. Run them (with the test dependencies
+installed) with::
+
+  python -m zope.app.authentication.benchmark --help
+
+``--json`` writes the results as JSON, to compare them between releases.
+"""
+__docformat__ = "reStructuredText"
+
+import argparse
+import base64
+import importlib.metadata
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+from zope.authentication.interfaces import IAuthentication
+from zope.location import Location
+from zope.pluggableauth.authentication import PluggableAuthentication
+from zope.pluggableauth.factories import FoundPrincipalFactory
+from zope.pluggableauth.interfaces import IPrincipalCreated
+from zope.publisher.browser import BrowserView
+from zope.publisher.browser import TestRequest
+
+from zope import component
+from zope.app.authentication import ftpplugins
+from zope.app.authentication import groupfolder
+from zope.app.authentication import httpplugins
+from zope.app.authentication import principalfolder
+from zope.app.authentication import session
+from zope.app.authentication.authentication import QuerySchemaSearchAdapter
+
+
+def setUp():
+    """Set up a clean component registry.
+
+    The test dependencies, which the benchmarks need, are only imported
+    when they run, so that this module can be imported without them.
+    """
+    import zope.component.testing
+    zope.component.testing.setUp()
+
+
+def tearDown():
+    import zope.component.testing
+    zope.component.testing.tearDown()
+
+
+def groupHierarchy(count, fanout):
+    """Return the (name, parent name) pairs of a tree of groups.
+
+    The groups are listed parents first:
+
+      >>> list(groupHierarchy(6, 2))
+      [('g0', None), ('g1', 'g0'), ('g2', 'g0'), ('g3', 'g1'), ('g4', 'g1'),
+       ('g5', 'g2')]
+
+    """
+    for i in range(count):
+        yield 'g%d' % i, ('g%d' % ((i - 1) // fanout) if i else None)
+
+
+def setUpPrincipals(count, folder_factory=principalfolder.PrincipalFolder,
+                    passwordManagerName='Plain Text'):
+    """Create a pluggable-authentication utility with some principals.
+
+    The principals are called p0, p1, ... and their passwords are empty.
+    """
+    from zope.password.testing import setUpPasswordManagers
+    setUpPasswordManagers()
+    pau = PluggableAuthentication('auth.')
+    principals = pau['principals'] = folder_factory('principals.')
+    for i in range(count):
+        principals['p%d' % i] = principalfolder.InternalPrincipal(
+            'p%d' % i, '', 'Principal %d' % i,
+            passwordManagerName=passwordManagerName)
+    pau.authenticatorPlugins = ('principals',)
+    component.provideUtility(pau, IAuthentication)
+    component.provideAdapter(FoundPrincipalFactory)
+    return pau
+
+
+def setUpGroups(pau, folder, factory, count, fanout):
+    """Add a group folder with a tree of groups."""
+    pau['groups'] = folder
+    pau.authenticatorPlugins += ('groups',)
+    component.provideHandler(groupfolder.setGroupsForPrincipal,
+                             (IPrincipalCreated,))
+    for name, parent in groupHierarchy(count, fanout):
+        folder[name] = factory(name)
+        if parent is not None:
+            addMembers(folder[parent], ['auth.group.' + name])
+
+
+def addMembers(group, principal_ids):
+    if hasattr(group, 'addPrincipals'):
+        group.addPrincipals(principal_ids)
+    else:
+        group.principals = group.principals + tuple(principal_ids)
+
+
+def removeMembers(group, principal_ids):
+    if hasattr(group, 'removePrincipals'):
+        group.removePrincipals(principal_ids)
+    else:
+        group.principals = [id for id in group.principals
+                            if id not in principal_ids]
+
+
+def benchmarkGroupEdits(folder_factory, group_factory, groups=10000,
+                        fanout=10, edits=100, seed=0):
+    """Time building a tree of groups and editing its memberships.
+
+    Returns the seconds it took to build the tree and the average seconds
+    per edit. An edit adds a principal to a random group and removes it
+    again, then does the same with a group without members.
+    """
+    rng = random.Random(seed)
+    setUp()
+    try:
+        pau = setUpPrincipals(edits)
+        folder = folder_factory('group.')
+        started = time.perf_counter()
+        setUpGroups(pau, folder, group_factory, groups, fanout)
+        built = time.perf_counter() - started
+
+        names = list(folder)
+        # The children of group i are groups i * fanout + 1 and on, so the
+        # groups whose first child would come after the last group have no
+        # members, and adding them to g0 can't make a cycle.
+        leaves = ['g%d' % i for i in range(1, groups)
+                  if i * fanout + 1 >= groups]
+        started = time.perf_counter()
+        for i in range(edits):
+            group = folder[rng.choice(names)]
+            principal_id = 'auth.principals.p%d' % i
+            addMembers(group, [principal_id])
+            removeMembers(group, [principal_id])
+            if not leaves:
+                continue
+            group = folder['g0']
+            member_id = 'auth.group.' + rng.choice(leaves)
+            if member_id not in group.principals:
+                addMembers(group, [member_id])
+                removeMembers(group, [member_id])
+        edited = (time.perf_counter() - started) / (edits or 1)
+    finally:
+        tearDown()
+    return built, edited
+
+
+def timed(func, number):
+    """Return the average seconds a call of `func` takes."""
+    started = time.perf_counter()
+    for i in range(number):
+        func()
+    return (time.perf_counter() - started) / (number or 1)
+
+
+def result(benchmark, case, seconds, **parameters):
+    """Return the result of a benchmark as a JSON-compatible dictionary.
+
+      >>> result('search', 'PrincipalFolder', 0.5, principals=10)
+      {'benchmark': 'search', 'case': 'PrincipalFolder', 'seconds': 0.5,
+       'parameters': {'principals': 10}}
+
+    """
+    return {'benchmark': benchmark, 'case': case, 'seconds': seconds,
+            'parameters': parameters}
+
+
+def benchmarkCredentials(number=1000):
+    """Time extracting credentials with the credentials plugins.
+
+    The requests carry credentials, which for the session plugin means that
+    they belong to a session the credentials were stored in before.
+    """
+    from zope.publisher.ftp import FTPRequest
+    from zope.publisher.interfaces import IRequest
+    from zope.session.http import CookieClientIdManager
+    from zope.session.interfaces import IClientId
+    from zope.session.interfaces import IClientIdManager
+    from zope.session.interfaces import ISession
+    from zope.session.interfaces import ISessionDataContainer
+    from zope.session.session import ClientId
+    from zope.session.session import PersistentSessionDataContainer
+    from zope.session.session import Session
+
+    results = []
+    setUp()
+    try:
+        plugin = httpplugins.HTTPBasicAuthCredentialsPlugin()
+        request = TestRequest(environ={
+            'HTTP_AUTHORIZATION': 'Basic ' + base64.b64encode(
+                b'bob:secret').decode('ascii')})
+        results.append(result(
+            'credentials', 'HTTP Basic',
+            timed(lambda: plugin.extractCredentials(request), number),
+            number=number))
+
+        component.provideAdapter(ClientId, (IRequest,), IClientId)
+        component.provideAdapter(Session, (IRequest,), ISession)
+        manager = CookieClientIdManager()
+        component.provideUtility(manager, IClientIdManager)
+        component.provideUtility(
+            PersistentSessionDataContainer(), ISessionDataContainer)
+        plugin = session.SessionCredentialsPlugin()
+        login = TestRequest(form={'login': 'bob', 'password': 'secret'})
+        plugin.extractCredentials(login)
+        request = TestRequest(environ={'HTTP_COOKIE': '%s=%s' % (
+            manager.namespace, IClientId(login))})
+        results.append(result(
+            'credentials', 'Session',
+            timed(lambda: plugin.extractCredentials(request), number),
+            number=number))
+
+        plugin = ftpplugins.FTPCredentialsPlugin()
+        request = FTPRequest(io.StringIO(''), {
+            'credentials': (b'bob', b'secret'), 'path': '/'})
+        results.append(result(
+            'credentials', 'FTP',
+            timed(lambda: plugin.extractCredentials(request), number),
+            number=number))
+    finally:
+        tearDown()
+    return results
+
+
+def benchmarkAuthentication(principals=1000, number=1000, seed=0,
+                            passwordManagerName='Plain Text'):
+    """Time authenticating credentials with a principal folder.
+
+    By default passwords are stored in plain text, so the time it takes to
+    look principals up isn't hidden by the time it takes to hash passwords.
+    """
+    rng = random.Random(seed)
+    setUp()
+    try:
+        pau = setUpPrincipals(principals,
+                              passwordManagerName=passwordManagerName)
+        folder = pau['principals']
+        credentials = iter([
+            {'login': 'p%d' % rng.randrange(principals), 'password': ''}
+            for i in range(number)])
+        authenticated = timed(
+            lambda: folder.authenticateCredentials(next(credentials)),
+            number)
+        ids = iter(['principals.p%d' % rng.randrange(principals)
+                    for i in range(number)])
+        found = timed(lambda: folder.principalInfo(next(ids)), number)
+    finally:
+        tearDown()
+    parameters = {'principals': principals, 'number': number,
+                  'passwordManager': passwordManagerName}
+    return [result('authenticate', 'authenticateCredentials', authenticated,
+                   **parameters),
+            result('authenticate', 'principalInfo', found, **parameters)]
+
+
+def transitiveGroups(pau, principal_id):
+    """Return the ids of all the groups a principal belongs to.
+
+    This looks the groups up like security policies do.
+    """
+    groups = set()
+    todo = [principal_id]
+    while todo:
+        for group_id in pau.getPrincipal(todo.pop()).groups:
+            if group_id not in groups:
+                groups.add(group_id)
+                todo.append(group_id)
+    return groups
+
+
+def benchmarkGroupResolution(folder_factory, group_factory, depth,
+                             number=100):
+    """Time finding the groups of a principal in a chain of groups."""
+    setUp()
+    try:
+        pau = setUpPrincipals(1)
+        setUpGroups(pau, folder_factory('group.'), group_factory, depth, 1)
+        addMembers(pau['groups']['g%d' % (depth - 1)],
+                   ['auth.principals.p0'])
+        assert len(transitiveGroups(pau, 'auth.principals.p0')) == depth
+        return timed(lambda: transitiveGroups(pau, 'auth.principals.p0'),
+                     number)
+    finally:
+        tearDown()
+
+
+def benchmarkSearch(folder_factory, principals=1000, number=100,
+                    batch_size=20, seed=0):
+    """Time searching principals with `QuerySchemaSearchAdapter`."""
+    rng = random.Random(seed)
+    setUp()
+    try:
+        pau = setUpPrincipals(principals, folder_factory)
+        adapter = QuerySchemaSearchAdapter(pau['principals'], pau)
+        queries = iter([
+            {'search': 'principal %d' % rng.randrange(principals)}
+            for i in range(number)])
+        return timed(
+            lambda: list(adapter.search(next(queries), 0, batch_size)),
+            number)
+    finally:
+        tearDown()
+
+
+def benchmarkViews(roles=10, permissions=100, number=10):
+    """Time the granting and role-permission views.
+
+    The role-permission view shows the whole role-permission map of a site,
+    and the granting view the roles and permissions of a principal.
+    """
+    from zope.annotation.attribute import AttributeAnnotations
+    from zope.annotation.interfaces import IAttributeAnnotatable
+    from zope.app.security.browser.auth import AuthUtilitySearchView
+    from zope.app.security.browser.principalterms import PrincipalTerms
+    from zope.authentication.interfaces import IPrincipalSource
+    from zope.authentication.principal import PrincipalSource
+    from zope.browser.interfaces import ITerms
+    from zope.formlib.interfaces import IInputWidget
+    from zope.formlib.interfaces import ISourceQueryView
+    from zope.formlib.source import SourceInputWidget
+    from zope.formlib.widgets import ChoiceInputWidget
+    from zope.formlib.widgets import DropdownWidget
+    from zope.interface import implementer
+    from zope.publisher.interfaces.browser import IBrowserRequest
+    from zope.schema.interfaces import IChoice
+    from zope.schema.interfaces import ISource
+    from zope.schema.interfaces import IVocabularyTokenized
+    from zope.security.interfaces import IPermission
+    from zope.security.permission import Permission
+    from zope.securitypolicy.interfaces import IPrincipalPermissionManager
+    from zope.securitypolicy.interfaces import IPrincipalRoleManager
+    from zope.securitypolicy.interfaces import IRole
+    from zope.securitypolicy.interfaces import IRolePermissionManager
+    from zope.securitypolicy.principalpermission import \
+        AnnotationPrincipalPermissionManager
+    from zope.securitypolicy.principalrole import \
+        AnnotationPrincipalRoleManager
+    from zope.securitypolicy.role import Role
+    from zope.securitypolicy.rolepermission import \
+        AnnotationRolePermissionManager
+
+    from zope.app.authentication.browser.granting import Granting
+    from zope.app.authentication.browser.rolepermissionview import \
+        RolePermissionView
+
+    class View(RolePermissionView, BrowserView):
+        pass
+
+    @implementer(IAttributeAnnotatable)
+    class Content:
+        pass
+
+    setUp()
+    try:
+        pau = setUpPrincipals(1)
+        for i in range(roles):
+            component.provideUtility(
+                Role('r%d' % i, 'Role %d' % i), IRole, 'r%d' % i)
+        for i in range(permissions):
+            component.provideUtility(
+                Permission('p%d' % i, 'Permission %d' % i), IPermission,
+                'p%d' % i)
+        component.provideAdapter(AttributeAnnotations)
+        for factory, provided in [
+                (AnnotationRolePermissionManager, IRolePermissionManager),
+                (AnnotationPrincipalRoleManager, IPrincipalRoleManager),
+                (AnnotationPrincipalPermissionManager,
+                 IPrincipalPermissionManager)]:
+            component.provideAdapter(
+                factory, (IAttributeAnnotatable,), provided)
+        for factory, required, provided in [
+                (ChoiceInputWidget, (IChoice, IBrowserRequest),
+                 IInputWidget),
+                (DropdownWidget,
+                 (IChoice, IVocabularyTokenized, IBrowserRequest),
+                 IInputWidget),
+                (SourceInputWidget, (IChoice, ISource, IBrowserRequest),
+                 IInputWidget),
+                (PrincipalTerms, (IPrincipalSource, IBrowserRequest),
+                 ITerms),
+                (AuthUtilitySearchView, (IAuthentication, IBrowserRequest),
+                 ISourceQueryView)]:
+            component.provideAdapter(factory, required, provided)
+
+        content = Content()
+        map = IRolePermissionManager(content)
+        for i in range(permissions):
+            map.grantPermissionToRole('p%d' % i, 'r%d' % (i % roles))
+
+        site = Location()
+        site.__parent__ = content
+
+        def rolePermissions():
+            view = View(site, TestRequest())
+            for permission in view.permissionRoles():
+                permission.roleSettings()
+
+        request = TestRequest()
+        term = PrincipalTerms(PrincipalSource(), request).getTerm(
+            pau.prefix + 'principals.p0')
+        request.form['field.principal.displayed'] = 'y'
+        request.form['field.principal'] = term.token
+
+        def granting():
+            Granting(content, request).status()
+
+        parameters = {'roles': roles, 'permissions': permissions,
+                      'number': number}
+        return [
+            result('views', 'RolePermissions.html',
+                   timed(rolePermissions, number), **parameters),
+            result('views', 'grant.html',
+                   timed(granting, number), **parameters)]
+    finally:
+        tearDown()
+
+
+BENCHMARKS = ('credentials', 'authenticate', 'groups', 'search', 'views',
+              'group-edits')
+
+FOLDERS = [
+    ('GroupFolder', groupfolder.GroupFolder, groupfolder.GroupInformation),
+    ('IndexedGroupFolder', groupfolder.IndexedGroupFolder,
+     groupfolder.IndexedGroupInformation)]
+
+
+def runBenchmarks(benchmarks=BENCHMARKS, principals=(1000,), depth=10,
+                  number=1000, groups=10000, fanout=10, edits=100):
+    """Run benchmarks and return their results."""
+    results = []
+    if 'credentials' in benchmarks:
+        results.extend(benchmarkCredentials(number))
+    if 'authenticate' in benchmarks:
+        for count in principals:
+            results.extend(benchmarkAuthentication(count, number))
+    if 'groups' in benchmarks:
+        for label, folder_factory, group_factory in FOLDERS:
+            for groups_depth in range(1, depth + 1):
+                results.append(result(
+                    'groups', label,
+                    benchmarkGroupResolution(
+                        folder_factory, group_factory, groups_depth,
+                        number // 10 or 1),
+                    depth=groups_depth, number=number // 10 or 1))
+    if 'search' in benchmarks:
+        for label, folder_factory in [
+                ('PrincipalFolder', principalfolder.PrincipalFolder),
+                ('IndexedPrincipalFolder',
+                 principalfolder.IndexedPrincipalFolder)]:
+            for count in principals:
+                results.append(result(
+                    'search', label,
+                    benchmarkSearch(folder_factory, count,
+                                    number // 10 or 1),
+                    principals=count, number=number // 10 or 1))
+    if 'views' in benchmarks:
+        results.extend(benchmarkViews(number=number // 100 or 1))
+    if 'group-edits' in benchmarks:
+        for label, folder_factory, group_factory in FOLDERS:
+            built, edited = benchmarkGroupEdits(
+                folder_factory, group_factory, groups, fanout, edits)
+            parameters = {'groups': groups, 'fanout': fanout}
+            results.append(result('group-build', label, built, **parameters))
+            results.append(result('group-edit', label, edited, edits=edits,
+                                  **parameters))
+    return results
+
+
+def _version():
+    try:
+        return importlib.metadata.version('zope.app.authentication')
+    except importlib.metadata.PackageNotFoundError:  # pragma: no cover
+        return None
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the authentication components.')
+    parser.add_argument('--benchmark', action='append', choices=BENCHMARKS,
+                        help='benchmark to run (default: all of them)')
+    parser.add_argument('--principals', type=int, nargs='+', default=[1000],
+                        help='numbers of principals to authenticate and '
+                             'search')
+    parser.add_argument('--depth', type=int, default=10,
+                        help='maximum depth of nested groups to resolve')
+    parser.add_argument('--number', type=int, default=1000,
+                        help='number of times to repeat fast operations')
+    parser.add_argument('--groups', type=int, default=10000,
+                        help='number of groups in the edited hierarchy')
+    parser.add_argument('--fanout', type=int, default=10,
+                        help='number of subgroups per group')
+    parser.add_argument('--edits', type=int, default=100,
+                        help='number of membership edits to time')
+    parser.add_argument('--json', action='store_true',
+                        help='write the results as JSON')
+    options = parser.parse_args(args)
+
+    results = runBenchmarks(
+        options.benchmark or BENCHMARKS, options.principals, options.depth,
+        options.number, options.groups, options.fanout, options.edits)
+    if options.json:
+        json.dump({'package': 'zope.app.authentication',
+                   'version': _version(),
+                   'python': platform.python_version(),
+                   'results': results},
+                  sys.stdout, indent=2, sort_keys=True)
+        print()
+        return
+    for entry in results:
+        parameters = ' '.join(
+            '%s=%s' % item for item in sorted(entry['parameters'].items()))
+        print('%-12s %-24s %12.3f us   %s' % (
+            entry['benchmark'], entry['case'], entry['seconds'] * 1e6,
+            parameters))
+
+
+if __name__ == '__main__':
+    main()
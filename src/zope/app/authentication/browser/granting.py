@@ -38,6 +38,8 @@ from zope.securitypolicy.interfaces import IRole
 from zope.securitypolicy.interfaces import Unset
 from zope.securitypolicy.vocabulary import GrantVocabulary
 
+from zope.app.authentication.cache import RegistrationCache
+
 
 try:
     text_type = unicode
@@ -133,6 +135,26 @@ class GrantWidget(RadioWidget):
         return " ".join(rendered_items)
 
 
+# Sorted ids and titles of the roles and permissions of a site
+_definitions = RegistrationCache()
+
+
+def _sortedDefinitions(interface):
+    definitions = [(utility.id, utility.title)
+                   for name, utility in getUtilitiesFor(interface)
+                   if utility.id != 'zope.Public']
+    definitions.sort(key=lambda definition: definition[1])
+    return tuple(definitions)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(_definitions.clear)
+
+
 class Granting:
 
     principal = None
@@ -149,6 +171,31 @@ class Granting:
         self.roles = None
         self.principal_widget = None
 
+    def _setUpWidgets(self, prefix, definitions, settings):
+        widgets = []
+        for id, title in definitions:
+            name = prefix + id
+            field = zope.schema.Choice(__name__=name,
+                                       title=title,
+                                       vocabulary=settings_vocabulary)
+            setUpWidget(self, name, field, IInputWidget,
+                        settings.get(id, Unset))
+            widgets.append(getattr(self, name + '_widget'))
+        return widgets
+
+    def _changedSettings(self, prefix, definitions, settings):
+        # The submitted settings that differ from the current ones.
+        for id, title in definitions:
+            widget = getattr(self, prefix + id + '_widget')
+            if widget.hasInput():
+                try:
+                    setting = widget.getInputValue()
+                except MissingInputError:  # pragma: no cover
+                    pass
+                else:
+                    if setting is not settings.get(id, Unset):
+                        yield id, setting
+
     def status(self):
         setUpWidget(self, 'principal', self.principal_field, IInputWidget)
         if not self.principal_widget.hasInput():
@@ -168,80 +215,45 @@ class Granting:
         if not isinstance(principal_token, str):
             principal_token = principal_token.decode('utf-8')
 
-        roles = [role for name, role in getUtilitiesFor(IRole)]
-        roles.sort(key=lambda x: x.title)
+        # The role and permission utilities rarely change, so they are only
+        # looked up and sorted again when registrations change.  The current
+        # settings are read at once.
+        roles = _definitions.get(IRole, lambda: _sortedDefinitions(IRole))
         principal_roles = IPrincipalRoleManager(self.context)
+        role_settings = dict(principal_roles.getRolesForPrincipal(principal))
+        role_prefix = principal_token + '.role.'
+        self.roles = self._setUpWidgets(role_prefix, roles, role_settings)
 
-        self.roles = []
-        for role in roles:
-            name = principal_token + '.role.' + role.id
-            field = zope.schema.Choice(__name__=name,
-                                       title=role.title,
-                                       vocabulary=settings_vocabulary)
-            setUpWidget(self, name, field, IInputWidget,
-                        principal_roles.getSetting(role.id, principal))
-            self.roles.append(getattr(self, name + '_widget'))
-
-        perms = [perm for name, perm in getUtilitiesFor(IPermission)]
-        perms.sort(key=lambda x: x.title)
+        perms = _definitions.get(
+            IPermission, lambda: _sortedDefinitions(IPermission))
         principal_perms = IPrincipalPermissionManager(self.context)
-
-        self.permissions = []
-        for perm in perms:
-            if perm.id == 'zope.Public':
-                continue
-            name = principal_token + '.permission.' + perm.id
-            field = zope.schema.Choice(__name__=name,
-                                       title=perm.title,
-                                       vocabulary=settings_vocabulary)
-            setUpWidget(self, name, field, IInputWidget,
-                        principal_perms.getSetting(perm.id, principal))
-            self.permissions.append(
-                getattr(self, name + '_widget'))
+        perm_settings = dict(
+            principal_perms.getPermissionsForPrincipal(principal))
+        perm_prefix = principal_token + '.permission.'
+        self.permissions = self._setUpWidgets(
+            perm_prefix, perms, perm_settings)
 
         if 'GRANT_SUBMIT' not in self.request:
             return ''
 
-        for role in roles:
-            name = principal_token + '.role.' + role.id
-            role_widget = getattr(self, name + '_widget')
-            if role_widget.hasInput():
-                try:
-                    setting = role_widget.getInputValue()
-                except MissingInputError:  # pragma: no cover
-                    pass
-                else:
-                    # Arrgh!
-                    if setting is Allow:
-                        principal_roles.assignRoleToPrincipal(
-                            role.id, principal)
-                    elif setting is Deny:
-                        principal_roles.removeRoleFromPrincipal(
-                            role.id, principal)
-                    else:
-                        principal_roles.unsetRoleForPrincipal(
-                            role.id, principal)
-
-        for perm in perms:
-            if perm.id == 'zope.Public':
-                continue
-            name = principal_token + '.permission.' + perm.id
-            perm_widget = getattr(self, name + '_widget')
-            if perm_widget.hasInput():
-                try:
-                    setting = perm_widget.getInputValue()
-                except MissingInputError:  # pragma: no cover
-                    pass
-                else:
-                    # Arrgh!
-                    if setting is Allow:
-                        principal_perms.grantPermissionToPrincipal(
-                            perm.id, principal)
-                    elif setting is Deny:
-                        principal_perms.denyPermissionToPrincipal(
-                            perm.id, principal)
-                    else:
-                        principal_perms.unsetPermissionForPrincipal(
-                            perm.id, principal)
+        # Only write the settings that changed.
+        for role_id, setting in self._changedSettings(
+                role_prefix, roles, role_settings):
+            if setting is Allow:
+                principal_roles.assignRoleToPrincipal(role_id, principal)
+            elif setting is Deny:
+                principal_roles.removeRoleFromPrincipal(role_id, principal)
+            else:
+                principal_roles.unsetRoleForPrincipal(role_id, principal)
+
+        for perm_id, setting in self._changedSettings(
+                perm_prefix, perms, perm_settings):
+            if setting is Allow:
+                principal_perms.grantPermissionToPrincipal(perm_id, principal)
+            elif setting is Deny:
+                principal_perms.denyPermissionToPrincipal(perm_id, principal)
+            else:
+                principal_perms.unsetPermissionForPrincipal(
+                    perm_id, principal)
 
         return _('Grants updated.')
@@ -0,0 +1,45 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Report on the password managers used by a principal folder
+"""
+from zope.publisher.browser import BrowserView
+
+from zope import component
+from zope.app.authentication.passwordupgrade import IPasswordUpgrade
+from zope.app.authentication.passwordupgrade import passwordManagerCounts
+
+
+class PasswordReport(BrowserView):
+    """List how many principals use each password manager."""
+
+    def upgrade(self):
+        return component.queryUtility(IPasswordUpgrade, context=self.context)
+
+    def passwordManagers(self):
+        """Return the password managers in use and their principal counts.
+
+        With an `IPasswordUpgrade` utility, the principals whose passwords
+        are outdated are counted as well.
+        """
+        upgrade = self.upgrade()
+        outdated = {}
+        if upgrade is not None:
+            for principal in self.context.values():
+                if upgrade.needsUpgrade(principal):
+                    name = principal.passwordManagerName
+                    outdated[name] = outdated.get(name, 0) + 1
+        return [{'name': name,
+                 'count': count,
+                 'outdated': outdated.get(name, 0)}
+                for name, count in passwordManagerCounts(self.context)]
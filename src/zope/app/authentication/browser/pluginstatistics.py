@@ -0,0 +1,60 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Plugin statistics view of caching PAUs
+"""
+from zope.i18nmessageid import ZopeMessageFactory as _
+from zope.publisher.browser import BrowserView
+
+from zope.app.authentication.instrumentation import BUCKETS
+
+
+def _duration(seconds):
+    """Format a duration for display."""
+    if seconds >= 1:
+        return '%g s' % seconds
+    return '%g ms' % round(seconds * 1000, 3)
+
+
+class PluginStatisticsView(BrowserView):
+    """Show the statistics of the calls of the plugins of a PAU."""
+
+    def update(self):
+        stats = self.context.getPluginStatistics()
+        if stats is not None and 'RESET_SUBMIT' in self.request:
+            stats.reset()
+            return _('Statistics reset.')
+        return ''
+
+    def enabled(self):
+        return self.context.getPluginStatistics() is not None
+
+    def buckets(self):
+        """Return the labels of the buckets of the latency histograms."""
+        labels = ['< %s' % _duration(bound) for bound in BUCKETS]
+        labels.append('>= %s' % _duration(BUCKETS[-1]))
+        return labels
+
+    def calls(self):
+        stats = self.context.getPluginStatistics()
+        if stats is None:
+            return []
+        return [{'plugin': name,
+                 'method': method,
+                 'calls': call.calls,
+                 'hits': call.hits,
+                 'misses': call.misses,
+                 'errors': call.errors,
+                 'mean': _duration(call.mean),
+                 'histogram': list(call.histogram)}
+                for (name, method), call in stats.items()]
@@ -29,6 +29,27 @@ from zope.securitypolicy.interfaces import IRole
 from zope.securitypolicy.interfaces import IRolePermissionManager
 from zope.securitypolicy.interfaces import Unset
 
+from zope.app.authentication.cache import RegistrationCache
+
+
+# Names of the roles and permissions of a site, sorted by translated title
+_sortedNames = RegistrationCache()
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(_sortedNames.clear)
+
+
+def _localeKey(request):
+    locale_id = getattr(getattr(request, 'locale', None), 'id', None)
+    if locale_id is None:
+        return None
+    return locale_id.language, locale_id.territory, locale_id.variant
+
 
 class RolePermissionView:
 
@@ -42,31 +63,39 @@ class RolePermissionView:
     context = None
     _roles = None
     _permissions = None
+    _permissionSettings = None
 
     def pagetip(self):
         return translate(self._pagetip, context=self.request)
 
+    def _sorted(self, interface):
+        utilities = dict(getUtilitiesFor(interface))
+        utilities.pop('zope.Public', None)
+
+        def sortedNames():
+            titles = [
+                (translate(utility.title, context=self.request).strip(), name)
+                for name, utility in utilities.items()]
+            titles.sort()
+            return tuple(name for title, name in titles)
+
+        # Translating and sorting the titles is only done once per site and
+        # locale; the utilities themselves may be persistent, so they are
+        # looked up for every view.
+        names = _sortedNames.get(
+            (interface, _localeKey(self.request)), sortedNames)
+        return [utilities[name] for name in names]
+
     def roles(self):
         roles = getattr(self, '_roles', None)
         if roles is None:
-            roles = [
-                (translate(role.title, context=self.request).strip(), role)
-                for name, role in getUtilitiesFor(IRole)]
-            roles.sort()
-            roles = self._roles = [role for name, role in roles]
+            roles = self._roles = self._sorted(IRole)
         return roles
 
     def permissions(self):
         permissions = getattr(self, '_permissions', None)
         if permissions is None:
-            permissions = [
-                (translate(perm.title, context=self.request).strip(), perm)
-                for name, perm in getUtilitiesFor(IPermission)
-                if name != 'zope.Public']
-            permissions.sort()
-            permissions = self._permissions = [perm
-                                               for name, perm in permissions]
-
+            permissions = self._permissions = self._sorted(IPermission)
         return permissions
 
     def availableSettings(self, noacquire=False):
@@ -80,10 +109,29 @@ class RolePermissionView:
 
         return rest if noacquire else [aq] + rest
 
+    def _settings(self):
+        # The setting names of all the cells of the role-permission map,
+        # by permission and role, read at once.
+        settings = getattr(self, '_permissionSettings', None)
+        if settings is None:
+            prm = IRolePermissionManager(self.context.__parent__)
+            settings = self._permissionSettings = {}
+            for permission_id, role_id, setting in (
+                    prm.getRolesAndPermissions()):
+                settings.setdefault(permission_id, {})[role_id] = (
+                    setting.getName())
+        return settings
+
+    def _setting(self, permission_id, role_id):
+        return self._settings().get(permission_id, {}).get(
+            role_id, Unset.getName())
+
     def permissionRoles(self):
         context = self.context.__parent__
         roles = self.roles()
-        return [PermissionRoles(permission, context, roles)
+        settings = self._settings()
+        return [PermissionRoles(permission, context, roles,
+                                settings.get(permission.id, {}))
                 for permission in self.permissions()]
 
     def permissionForID(self, pid):
@@ -96,6 +144,19 @@ class RolePermissionView:
         role = getUtility(IRole, rid)
         return RolePermissions(role, self.context.__parent__, permissions)
 
+    def _change(self, prm, permission_id, role_id, setting):
+        # Only write cells whose setting changes.
+        if setting == self._setting(permission_id, role_id):
+            return
+        if setting == Unset.getName():
+            prm.unsetPermissionFromRole(permission_id, role_id)
+        elif setting == Allow.getName():
+            prm.grantPermissionToRole(permission_id, role_id)
+        elif setting == Deny.getName():
+            prm.denyPermissionToRole(permission_id, role_id)
+        else:
+            raise ValueError("Incorrect setting: %s" % setting)
+
     def update(self, testing=None):
         status = ''
         changed = False
@@ -114,15 +175,7 @@ class RolePermissionView:
                         continue
                     setting = self.request.get(f"p{ip}r{ir}", None)
                     if setting is not None:
-                        if setting == Unset.getName():
-                            prm.unsetPermissionFromRole(rperm, rrole)
-                        elif setting == Allow.getName():
-                            prm.grantPermissionToRole(rperm, rrole)
-                        elif setting == Deny.getName():
-                            prm.denyPermissionToRole(rperm, rrole)
-                        else:
-                            raise ValueError("Incorrect setting: %s"
-                                             % setting)  # pragma: no cover
+                        self._change(prm, rperm, rrole, setting)
             changed = True
 
         if 'SUBMIT_PERMS' in self.request:
@@ -131,16 +184,7 @@ class RolePermissionView:
             rperm = self.request.get('permission_id')
             settings = self.request.get('settings', ())
             for ir in range(len(roles)):
-                rrole = roles[ir].id
-                setting = settings[ir]
-                if setting == Unset.getName():
-                    prm.unsetPermissionFromRole(rperm, rrole)
-                elif setting == Allow.getName():
-                    prm.grantPermissionToRole(rperm, rrole)
-                elif setting == Deny.getName():
-                    prm.denyPermissionToRole(rperm, rrole)
-                else:
-                    raise ValueError("Incorrect setting: %s" % setting)
+                self._change(prm, rperm, roles[ir].id, settings[ir])
             changed = True
 
         if 'SUBMIT_ROLE' in self.request:
@@ -158,14 +202,17 @@ class RolePermissionView:
                             mapping={'permission': permission_translated})
                     raise UserError(msg)
                 if rperm in allowed:
-                    prm.grantPermissionToRole(rperm, role_id)
+                    setting = Allow
                 elif rperm in denied:
-                    prm.denyPermissionToRole(rperm, role_id)
+                    setting = Deny
                 else:
-                    prm.unsetPermissionFromRole(rperm, role_id)
+                    setting = Unset
+                self._change(prm, rperm, role_id, setting.getName())
             changed = True
 
         if changed:
+            # The settings have to be read again.
+            self._permissionSettings = None
             formatter = self.request.locale.dates.getFormatter(
                 'dateTime', 'medium')
             status = _("Settings changed at ${date_time}",
@@ -178,10 +225,12 @@ class RolePermissionView:
 @implementer(IPermission)
 class PermissionRoles:
 
-    def __init__(self, permission, context, roles):
+    def __init__(self, permission, context, roles, settings=None):
         self._permission = permission
         self._context = context
         self._roles = roles
+        # role id -> setting name, if already known
+        self._settings = settings
 
     @property
     def id(self):
@@ -199,11 +248,13 @@ class PermissionRoles:
         """
         Returns the list of setting names of each role for this permission.
         """
-        prm = IRolePermissionManager(self._context)
-        proles = prm.getRolesForPermission(self._permission.id)
-        settings = {}
-        for role, setting in proles:
-            settings[role] = setting.getName()
+        settings = self._settings
+        if settings is None:
+            prm = IRolePermissionManager(self._context)
+            proles = prm.getRolesForPermission(self._permission.id)
+            settings = {}
+            for role, setting in proles:
+                settings[role] = setting.getName()
         nosetting = Unset.getName()
         return [settings.get(role.id, nosetting) for role in self._roles]
 
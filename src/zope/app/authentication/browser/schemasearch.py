@@ -28,13 +28,33 @@ from zope.schema import getFieldsInOrder
 from zope.traversing.api import getName
 from zope.traversing.api import getPath
 
+from zope.app.authentication.cache import LRUCache
 from zope.app.authentication.i18n import ZopeMessageFactory as _
+from zope.app.authentication.interfaces import IBatchedQuerySchemaSearch
 
 
 search_label = _('search-button', 'Search')
+previous_label = _('previous-batch-button', 'Previous')
+next_label = _('next-batch-button', 'Next')
 source_label = _("Source path")
 source_title = _("Path to the source utility")
 
+# The number of principals shown at a time by plugins whose searches are
+# batched, unless another batch size is submitted.
+BATCH_SIZE = 50
+
+# The parts of the rendered search forms that don't depend on the request,
+# by source path, schema, prefix and locale.
+_skeletons = LRUCache(maxsize=1000, timeout=None)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(_skeletons.clear)
+
 
 @implementer(ISourceQueryView)
 class QuerySchemaSearchView:
@@ -45,9 +65,68 @@ class QuerySchemaSearchView:
 
     def render(self, name):
         schema = self.context.schema
-        sourcename = getName(self.context)
-        sourcepath = getPath(self.context)
         setUpWidgets(self, schema, IInputWidget, prefix=name + '.field')
+        fields = getFieldsInOrder(schema)
+        sourcepath = getPath(self.context)
+        locale = self.request.locale.id
+        key = (sourcepath, schema, name,
+               (locale.language, locale.territory, locale.variant))
+        skeleton = _skeletons.get(key)
+        if skeleton is None:
+            skeleton = self._skeleton(name, sourcepath, fields)
+            _skeletons.set(key, skeleton)
+
+        # Only the widgets, which show the values of the request, are
+        # rendered every time.
+        html = [skeleton[0]]
+        for (field_name, _field), static in zip(fields, skeleton[1:]):
+            widget = getattr(self, field_name + '_widget')
+            html.append('    %s' % widget())
+            if widget.error():  # pragma: no cover
+                html.append('    <div class="error">')
+                html.append('      %s' % widget.error())
+                html.append('    </div>')
+            html.append(static)
+        html.extend(self._pagingControls(name))
+        return '\n'.join(html)
+
+    def _pagingControls(self, name):
+        """Return the controls paging through the results of a search.
+
+        Only the results of batched searches are paged.
+        """
+        if not (IBatchedQuerySchemaSearch.providedBy(self.context)
+                and self._searched(name)):
+            return []
+        start = self._batchArgument(name + '.start') or 0
+        batch_size = self._batchSize(name)
+        total = self.context.count(self._query(name))
+        if start == 0 and total <= batch_size:
+            return []
+        html = ['<div class="row">', '  <div class="field">']
+        html.append('    <input type="hidden" name="%s" value="%d" />'
+                    % (name + '.batch_size', batch_size))
+        if start > 0:
+            html.append(
+                '    <button type="submit" name="%s" value="%d">%s</button>'
+                % (name + '.start', max(start - batch_size, 0),
+                   translate(previous_label, context=self.request)))
+        if start + batch_size < total:
+            html.append(
+                '    <button type="submit" name="%s" value="%d">%s</button>'
+                % (name + '.start', start + batch_size,
+                   translate(next_label, context=self.request)))
+        html.append('  </div>')
+        html.append('</div>')
+        return html
+
+    def _skeleton(self, name, sourcepath, fields):
+        """Return the parts of the form surrounding the widgets.
+
+        The form is rendered with None in place of each widget, and split
+        there.
+        """
+        sourcename = getName(self.context)
         html = []
 
         # add sub title for source search field
@@ -72,7 +151,7 @@ class QuerySchemaSearchView:
         # start row for search fields
         html.append('<div class="row">')
 
-        for field_name, _field in getFieldsInOrder(schema):
+        for field_name, _field in fields:
             widget = getattr(self, field_name + '_widget')
 
             # for each field add label...
@@ -85,12 +164,7 @@ class QuerySchemaSearchView:
 
             # ...and field widget
             html.append('  <div class="field">')
-            html.append('    %s' % widget())
-
-            if widget.error():  # pragma: no cover
-                html.append('    <div class="error">')
-                html.append('      %s' % widget.error())
-                html.append('    </div>')
+            html.append(None)
             html.append('  </div>')
         # end row
         html.append('</div>')
@@ -104,11 +178,21 @@ class QuerySchemaSearchView:
         html.append('  </div>')
         html.append('</div>')
 
-        return '\n'.join(html)
-
-    def results(self, name):
-        if (name + '.search') not in self.request:
-            return None
+        parts = [[]]
+        for line in html:
+            if line is None:
+                parts.append([])
+            else:
+                parts[-1].append(line)
+        return tuple('\n'.join(part) for part in parts)
+
+    def _searched(self, name):
+        # The search button, or one of the paging buttons, was pressed.
+        return (name + '.search') in self.request or (
+            IBatchedQuerySchemaSearch.providedBy(self.context)
+            and (name + '.start') in self.request)
+
+    def _query(self, name):
         schema = self.context.schema
         setUpWidgets(self, schema, IInputWidget, prefix=name + '.field')
         # XXX inline the original getWidgetsData call in
@@ -128,4 +212,26 @@ class QuerySchemaSearchView:
                         widget_name, widget.label, 'the field is required'))
         if errors:  # pragma: no cover
             raise WidgetsError(errors, widgetsData=data)
-        return self.context.search(data)
+        return data
+
+    def results(self, name):
+        if not self._searched(name):
+            return None
+        return self.context.search(self._query(name),
+                                   self._batchArgument(name + '.start'),
+                                   self._batchSize(name))
+
+    def _batchSize(self, name):
+        batch_size = self._batchArgument(name + '.batch_size')
+        if (batch_size is None
+                and IBatchedQuerySchemaSearch.providedBy(self.context)):
+            return BATCH_SIZE
+        return batch_size
+
+    def _batchArgument(self, key):
+        # optional paging information submitted with the search form
+        try:
+            value = int(self.request.get(key))
+        except (TypeError, ValueError):
+            return None
+        return value if value >= 0 else None
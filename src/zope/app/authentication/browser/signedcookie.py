@@ -0,0 +1,32 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Signing keys view of signed cookie credentials plugins
+"""
+from zope.i18nmessageid import ZopeMessageFactory as _
+from zope.publisher.browser import BrowserView
+from zope.security.proxy import removeSecurityProxy
+
+
+class SigningKeysView(BrowserView):
+    """Make new signing keys for the tokens of a plugin."""
+
+    def update(self):
+        if 'ROTATE_SUBMIT' in self.request:
+            self.context.rotateKey()
+            return _('A new signing key was made.')
+        return ''
+
+    def keyCount(self):
+        # The keys themselves aren't accessible through the web.
+        return len(removeSecurityProxy(self.context).keys)
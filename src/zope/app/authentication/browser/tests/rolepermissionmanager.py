@@ -64,7 +64,7 @@ class RolePermissionManager:
 
     def getRolesAndPermissions(self):
         '''See interface IRolePermissionMap'''
-        raise NotImplementedError("Not used by tests")
+        return self._getRolePermissions().getAllCells()
 
     def getSetting(self, permission_id, role_id):
         '''See interface IRolePermissionMap'''
@@ -25,12 +25,17 @@ import transaction
 from webtest import TestApp
 from zope.app.wsgi.testlayer import encodeMultipartFormdata
 from zope.app.wsgi.testlayer import http
+from zope.container.interfaces import INameChooser
 from zope.exceptions.interfaces import UserError
 from zope.interface import directlyProvides
 from zope.pluggableauth.factories import Principal
 from zope.testing import renormalizing
 
+from zope.app.authentication.groupfolder import GroupFolder
+from zope.app.authentication.groupfolder import IndexedGroupFolder
+from zope.app.authentication.idpicker import NumericIdPicker
 from zope.app.authentication.principalfolder import IInternalPrincipal
+from zope.app.authentication.principalfolder import IndexedPrincipalFolder
 from zope.app.authentication.principalfolder import PrincipalFolder
 from zope.app.authentication.testing import AppAuthenticationLayer
 
@@ -126,6 +131,13 @@ class FunkTest(unittest.TestCase):
         self.assertIn("p1", str(e))
         self.assertIn("are already being used", str(e))
 
+    def test_numeric_id_pickers(self):
+        # The name choosers registered for the folder classes win over
+        # those zope.pluggableauth registers for their interfaces.
+        for folder in (PrincipalFolder(), IndexedPrincipalFolder(),
+                       GroupFolder(), IndexedGroupFolder()):
+            self.assertIsInstance(INameChooser(folder), NumericIdPicker)
+
 
 checker = renormalizing.RENormalizing([
     (re.compile(r"HTTP/1\.0 200 .*"), "HTTP/1.1 200 OK"),
@@ -177,4 +189,6 @@ def test_suite():
         unittest.defaultTestLoader.loadTestsFromTestCase(FunkTest),
         issue663,
         doctest.DocFileSuite('../schemasearch.rst'),
+        doctest.DocFileSuite('../typeahead.rst', optionflags=flags),
+        doctest.DocTestSuite('zope.app.authentication.browser.typeahead'),
     ))
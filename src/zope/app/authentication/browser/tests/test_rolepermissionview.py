@@ -92,6 +92,45 @@ class Test(PlacefulSetup, unittest.TestCase):
         self.assertEqual([role.title for role in self.view.permissions()],
                          ["Write", "Read"])
 
+    def testSortedListsAreCached(self):
+        translated = []
+        domain = TranslationDomain(Member="A Member", Write="A Write")
+
+        def translate(msgid, *args, **kw):
+            translated.append(msgid)
+            return domain.translations.get(msgid, msgid)
+        domain.translate = translate
+        ztapi.provideUtility(ITranslationDomain, domain, 'testdomain')
+
+        self.assertEqual([role.id for role in self.view.roles()],
+                         ['member', 'manager'])
+        self.assertEqual(sorted(translated), ['Manager', 'Member'])
+
+        del translated[:]
+        view = RolePermissionView(self.view.context, None)
+        self.assertEqual([role.id for role in view.roles()],
+                         ['member', 'manager'])
+        self.assertEqual([perm.id for perm in view.permissions()],
+                         ['write', 'read'])
+        self.assertEqual(sorted(translated), ['Read', 'Write'])
+
+        del translated[:]
+        view = RolePermissionView(self.view.context, None)
+        view.roles()
+        view.permissions()
+        self.assertEqual(translated, [])
+
+        # Other locales have their own lists
+        view = RolePermissionView(self.view.context, TestRequest())
+        view.roles()
+        self.assertEqual(sorted(translated), ['Manager', 'Member'])
+
+        # Registering roles changes the lists
+        defineRole('admin', Message('Admin', 'testdomain'))
+        view = RolePermissionView(self.view.context, None)
+        self.assertEqual([role.id for role in view.roles()],
+                         ['member', 'admin', 'manager'])
+
     def testMatrix(self):
         roles = self.view.roles()
         permissions = self.view.permissions()
@@ -203,6 +242,46 @@ class Test(PlacefulSetup, unittest.TestCase):
             if pid == 'write':
                 self.assertEqual(pinfo['setting'], 'Unset')
 
+    def testOnlyChangedCellsAreWritten(self):
+        site = self.view.context.__parent__
+        writes = []
+        for name in ('grantPermissionToRole', 'denyPermissionToRole',
+                     'unsetPermissionFromRole'):
+            def write(permission_id, role_id, name=name,
+                      method=getattr(site, name)):
+                writes.append((name, permission_id, role_id))
+                method(permission_id, role_id)
+            setattr(site, name, write)
+
+        env = {
+            'p0': 'read', 'p1': 'write',
+            'r0': 'manager', 'r1': 'member',
+            'p0r0': 'Allow', 'p0r1': 'Unset',
+            'p1r0': 'Unset', 'p1r1': 'Deny',
+            'SUBMIT': 1
+        }
+        self.view.request = TestRequest(environ=env)
+        self.view.update()
+        self.assertEqual(writes, [
+            ('grantPermissionToRole', 'read', 'manager'),
+            ('denyPermissionToRole', 'write', 'member'),
+        ])
+        self.assertEqual(
+            [permissionRoles.roleSettings()
+             for permissionRoles in self.view.permissionRoles()],
+            [['Deny', 'Unset'], ['Unset', 'Allow']])
+
+        del writes[:]
+        self.view.update()
+        self.assertEqual(writes, [])
+
+        env['p1r1'] = 'Unset'
+        self.view.request = TestRequest(environ=env)
+        self.view.update()
+        self.assertEqual(writes, [
+            ('unsetPermissionFromRole', 'write', 'member'),
+        ])
+
     def testRolePermissions_UserError(self):
         env = {'Allow': ['read'],
                'Deny': ['read'],
@@ -0,0 +1,167 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Type-ahead principal search returning JSON
+"""
+__docformat__ = "reStructuredText"
+
+import base64
+import binascii
+import functools
+import itertools
+import json
+
+from zope.publisher.browser import BrowserView
+from zope.security.proxy import removeSecurityProxy
+
+from zope.app.authentication.fanout import FanOut
+from zope.app.authentication.fanout import queriableAuthenticators
+from zope.app.authentication.interfaces import IBatchedQuerySchemaSearch
+
+
+# The number of principals returned when no limit is requested, and the
+# largest limit that may be requested.
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# The number of seconds plugins searching concurrently have to answer.
+TIMEOUT = 2.0
+
+
+def encodeCursor(name, offset):
+    """Return the cursor of the `offset`th match of plugin `name`.
+
+      >>> cursor = encodeCursor('principals', 10)
+      >>> decodeCursor(cursor)
+      ('principals', 10)
+      >>> decodeCursor('garbage')
+      Traceback (most recent call last):
+      ...
+      ValueError: garbage
+
+    """
+    data = json.dumps([name, offset]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decodeCursor(cursor):
+    try:
+        name, offset = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError(cursor)
+    if not isinstance(name, str) or not isinstance(offset, int):
+        raise ValueError(cursor)
+    return name, offset
+
+
+def _search(plugin, queriable, prefix, query, offset, limit):
+    # Only batched searches are sure to take `start` as an offset into the
+    # matches; other searches are cut short as they are iterated.  Results
+    # are only iterated, never sized, so that nothing counts the matches.
+    # One more principal than fits is searched, which tells whether there
+    # are more.
+    if IBatchedQuerySchemaSearch.providedBy(queriable):
+        ids = list(itertools.islice(
+            queriable.search(query, offset, limit + 1), limit + 1))
+    else:
+        ids = list(itertools.islice(
+            queriable.search(query), offset, offset + limit + 1))
+    # The titles are looked up by the same task, so that the plugins
+    # searched at the same time are asked for them at the same time too.
+    return ([_principal(plugin, prefix, id) for id in ids[:limit]],
+            len(ids) > limit)
+
+
+def _principal(plugin, prefix, id):
+    info = plugin.principalInfo(id[len(prefix):])
+    title = info.title if info is not None else id
+    return {'id': id, 'title': title}
+
+
+class PrincipalTypeAhead(BrowserView):
+    """Find the principals whose search text contains what was typed.
+
+    See typeahead.rst for details.
+    """
+
+    def __call__(self):
+        self.request.response.setHeader('Content-Type', 'application/json')
+        try:
+            data = self.search(
+                self.request.get('q', ''),
+                self._limit(),
+                self.request.get('cursor') or None)
+        except ValueError:
+            self.request.response.setStatus(400)
+            data = {'error': 'Invalid limit or cursor.'}
+        return json.dumps(data)
+
+    def _limit(self):
+        limit = self.request.get('limit')
+        if not limit:
+            return DEFAULT_LIMIT
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError(limit)
+        return min(limit, MAX_LIMIT)
+
+    def search(self, text, limit=DEFAULT_LIMIT, cursor=None):
+        """Return at most `limit` principals matching `text`.
+
+        The principals are returned with the cursor from which to continue,
+        which is None once all of them were returned.
+        """
+        if not text:
+            return {'results': [], 'cursor': None}
+        # The view is protected; the plugins aren't meant to be used
+        # through the web.
+        pau = removeSecurityProxy(self.context)
+        queriables = [
+            (name, plugin, queriable)
+            for name, plugin, queriable in queriableAuthenticators(pau)
+            if 'search' in queriable.schema]
+        names = [name for name, plugin, queriable in queriables]
+        index = offset = 0
+        if cursor is not None:
+            name, offset = decodeCursor(cursor)
+            if name not in names or offset < 0:
+                raise ValueError(cursor)
+            index = names.index(name)
+
+        # The plugins are searched at the same time, each for as many
+        # principals as may be needed.
+        query = {'search': text}
+        fanout = FanOut([
+            (name, plugin, functools.partial(
+                _search, plugin, queriable, pau.prefix, query,
+                offset if i == 0 else 0, limit))
+            for i, (name, plugin, queriable) in enumerate(
+                queriables[index:])], TIMEOUT)
+        found = dict(fanout)
+        results = []
+        for name, plugin, queriable in queriables[index:]:
+            principals, more = found.get(name, ((), False))
+            needed = limit - len(results)
+            results.extend(principals[:needed])
+            if more or len(principals) > needed:
+                data = {'results': results,
+                        'cursor': encodeCursor(name, offset + needed)}
+                break
+            offset = 0
+        else:
+            data = {'results': results, 'cursor': None}
+        unavailable = sorted(fanout.timedOut + fanout.failed)
+        if unavailable:
+            data['unavailable'] = unavailable
+        return data
@@ -0,0 +1,185 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Bulk import and export of the principals of principal folders
+"""
+__docformat__ = "reStructuredText"
+
+import csv
+import json
+
+import transaction
+from zope.container.contained import notifyContainerModified
+from zope.event import notify
+from zope.lifecycleevent import ObjectAddedEvent
+
+from zope.app.authentication.idpicker import NumericIdPicker
+from zope.app.authentication.principalfolder import InternalPrincipal
+from zope.app.authentication.principalfolder import setEncodedPassword
+
+
+# The fields of principal records, in the order they are exported in.
+FIELDS = ('id', 'login', 'password', 'passwordManagerName', 'title',
+          'description')
+
+BATCH_SIZE = 1000
+
+
+def exportPrincipals(folder):
+    """Return an iterator of the records of the principals of `folder`.
+
+    Passwords are exported encoded, as stored.
+    """
+    for id, principal in folder.items():
+        password = principal.getPassword()
+        if isinstance(password, bytes):
+            password = password.decode('utf-8')
+        yield {'id': id,
+               'login': principal.login,
+               'password': password,
+               'passwordManagerName': principal.passwordManagerName,
+               'title': principal.title,
+               'description': principal.description}
+
+
+def _principal(record, position, encoded):
+    login = record.get('login')
+    if not login:
+        raise ValueError('Record %d has no login' % position)
+    managerName = record.get('passwordManagerName') or 'SSHA'
+    title = record.get('title') or ''
+    description = record.get('description') or ''
+    if not encoded:
+        return InternalPrincipal(
+            login, record.get('password') or '', title, description,
+            passwordManagerName=managerName)
+    # Encoding a password is what makes importing slow, so the principal
+    # is created without one, which plain text passwords make cheap.
+    principal = InternalPrincipal(
+        login, '', title, description, passwordManagerName='Plain Text')
+    setEncodedPassword(principal, record.get('password') or '', managerName)
+    return principal
+
+
+def importPrincipals(folder, records, encoded=True, batchSize=BATCH_SIZE,
+                     commit=True, progress=None):
+    """Add principals to `folder` from an iterable of records.
+
+    If a record is invalid, an error is raised, and the principals of the
+    current batch are left in the folder, without their events, in the
+    uncommitted transaction, which must be aborted.
+
+    See bulk.rst for details.
+    """
+    picker = NumericIdPicker(folder)
+    count = 0
+    batch = []
+    for record in records:
+        principal = _principal(record, count + len(batch) + 1, encoded)
+        id = record.get('id')
+        if id:
+            picker.checkName(id, principal)
+        else:
+            id = picker.chooseName('', principal)
+        # Adding a principal that already names the folder as its parent
+        # doesn't notify; the events are sent once the batch is added.
+        principal.__parent__ = folder
+        principal.__name__ = id
+        folder[id] = principal
+        batch.append(principal)
+        if len(batch) >= batchSize:
+            count += _finishBatch(folder, batch, commit)
+            batch = []
+            if progress is not None:
+                progress(count)
+    if batch:
+        count += _finishBatch(folder, batch, commit)
+        if progress is not None:
+            progress(count)
+    return count
+
+
+def _finishBatch(folder, batch, commit):
+    for principal in batch:
+        notify(ObjectAddedEvent(principal, folder, principal.__name__))
+    notifyContainerModified(folder)
+    if commit:
+        transaction.commit()
+    else:
+        transaction.savepoint(optimistic=True)
+    jar = getattr(folder, '_p_jar', None)
+    if jar is not None:
+        # Let go of the principals added so far.
+        jar.cacheGC()
+    return len(batch)
+
+
+def readCSV(file):
+    """Return an iterator of the records of a CSV file with a header row.
+
+      >>> import io
+      >>> data = io.StringIO('login,title,password\\r\\nbob,Bob,\\r\\n')
+      >>> list(readCSV(data))
+      [{'login': 'bob', 'title': 'Bob'}]
+
+    Empty fields are left out.
+    """
+    for row in csv.DictReader(file):
+        yield {name: value for name, value in row.items() if value}
+
+
+def writeCSV(records, file):
+    """Write records to a CSV file, with a header row.
+
+      >>> import io
+      >>> data = io.StringIO()
+      >>> writeCSV([{'id': 'bob', 'login': 'bob', 'title': 'Bob'}], data)
+      >>> print(data.getvalue())
+      id,login,password,passwordManagerName,title,description
+      bob,bob,,,Bob,
+      <BLANKLINE>
+
+    """
+    writer = csv.DictWriter(file, FIELDS, lineterminator='\n')
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+
+
+def readJSONL(file):
+    """Return an iterator of the records of a JSON lines file.
+
+      >>> import io
+      >>> data = io.StringIO('{"login": "bob", "title": "Bob"}\\n\\n')
+      >>> list(readJSONL(data))
+      [{'login': 'bob', 'title': 'Bob'}]
+
+    """
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def writeJSONL(records, file):
+    """Write records to a JSON lines file.
+
+      >>> import io
+      >>> data = io.StringIO()
+      >>> writeJSONL([{'id': 'bob', 'login': 'bob'}], data)
+      >>> print(data.getvalue())
+      {"id": "bob", "login": "bob"}
+      <BLANKLINE>
+
+    """
+    for record in records:
+        file.write(json.dumps(record) + '\n')
@@ -0,0 +1,215 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Process-wide caches used by the authentication components
+"""
+__docformat__ = "reStructuredText"
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from zope import component
+
+
+_marker = object()
+
+
+class LRUCache:
+    """A thread-safe cache of limited size whose entries expire.
+
+    When the cache is full, the least recently used entry is dropped:
+
+      >>> cache = LRUCache(maxsize=2, timeout=10)
+      >>> cache.set('a', 1)
+      >>> cache.set('b', 2)
+      >>> cache.get('a')
+      1
+      >>> cache.set('c', 3)
+      >>> print(cache.get('b'))
+      None
+      >>> cache.get('a'), cache.get('c')
+      (1, 3)
+      >>> len(cache)
+      2
+
+    Entries expire `timeout` seconds after they were set.  To show this,
+    we'll use a clock we control:
+
+      >>> now = [0]
+      >>> cache = LRUCache(maxsize=2, timeout=10, clock=lambda: now[0])
+      >>> cache.set('a', 1)
+      >>> now[0] = 9
+      >>> cache.get('a')
+      1
+      >>> now[0] = 10
+      >>> cache.get('a', 'expired')
+      'expired'
+      >>> len(cache)
+      0
+
+    A timeout of None means that entries don't expire.
+
+    The cache counts its hits and misses:
+
+      >>> cache.hits, cache.misses
+      (1, 1)
+
+    Entries can be removed one by one, by looking at their values, or all
+    at once:
+
+      >>> cache.set('a', 1)
+      >>> cache.set('b', 2)
+      >>> cache.invalidate('a')
+      >>> cache.invalidate('x')
+      >>> list(cache.keys())
+      ['b']
+      >>> cache.set('a', 1)
+      >>> cache.invalidateValues(lambda value: value > 1)
+      >>> list(cache.keys())
+      ['a']
+      >>> cache.clear()
+      >>> len(cache)
+      0
+
+    """
+
+    def __init__(self, maxsize=1000, timeout=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _marker)
+            if entry is not _marker:
+                expires, value = entry
+                if expires is None or expires > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = None
+        if self.timeout is not None:
+            expires = self._clock() + self.timeout
+        with self._lock:
+            self._data[key] = expires, value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidateValues(self, predicate):
+        """Remove the entries whose value satisfies `predicate`."""
+        with self._lock:
+            for key in [key for key, (expires, value) in self._data.items()
+                        if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        now = self._clock()
+        with self._lock:
+            return sum(1 for expires, value in self._data.values()
+                       if expires is None or expires > now)
+
+
+def registrationState(context=None):
+    """Return a value that changes when component registrations change.
+
+    This covers the registrations of the site manager of `context` and of
+    the site managers it is based on:
+
+      >>> from zope.interface import Interface
+      >>> state = registrationState()
+      >>> registrationState() == state
+      True
+      >>> component.provideUtility(object(), Interface, 'registered')
+      >>> registrationState() == state
+      False
+
+    """
+    sm = component.getSiteManager(context)
+    # Registries count their changes.
+    return tuple(getattr(registry, '_generation', None)
+                 for registry in sm.adapters.ro + sm.utilities.ro)
+
+
+class RegistrationCache:
+    """Values computed from the component registrations of a site.
+
+    The values are kept per site manager, and computed again when the
+    registrations of the site manager (or of its bases) change:
+
+      >>> from zope.interface import Interface
+      >>> class IThing(Interface):
+      ...     pass
+      >>> cache = RegistrationCache()
+      >>> def compute():
+      ...     print('computing')
+      ...     return sorted(name for name, utility
+      ...                   in component.getUtilitiesFor(IThing))
+      >>> cache.get('names', compute)
+      computing
+      []
+      >>> cache.get('names', compute)
+      []
+      >>> component.provideUtility(object(), IThing, 'registered')
+      >>> cache.get('names', compute)
+      computing
+      ['registered']
+
+    Values shouldn't be persistent objects, which belong to a database
+    connection, since the cache is shared by all threads.
+    """
+
+    def __init__(self):
+        self._values = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, context=None):
+        sm = component.getSiteManager(context)
+        state = registrationState(context)
+        with self._lock:
+            entry = self._values.get(sm.utilities)
+            if entry is None or entry[0] != state:
+                entry = self._values[sm.utilities] = state, {}
+            value = entry[1].get(key, _marker)
+        if value is _marker:
+            value = compute()
+            with self._lock:
+                entry[1][key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
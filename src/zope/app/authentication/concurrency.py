@@ -0,0 +1,223 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Authenticator plugin limiting the number of passwords checked at once
+"""
+__docformat__ = "reStructuredText"
+
+import logging
+import threading
+
+import persistent
+import zope.schema
+from zope.container.contained import Contained
+from zope.interface import Interface
+from zope.interface import implementer
+from zope.pluggableauth.factories import PrincipalInfo
+from zope.pluggableauth.interfaces import IAuthenticatorPlugin
+from zope.pluggableauth.interfaces import IPluggableAuthentication
+from zope.pluggableauth.interfaces import IQuerySchemaSearch
+from zope.pluggableauth.plugins.principalfolder import \
+    IInternalPrincipalContainer
+
+from zope import component
+from zope.app.authentication.i18n import ZopeMessageFactory as _
+
+
+logger = logging.getLogger(__name__)
+
+
+class IConcurrencyLimitingAuthenticatorPlugin(IAuthenticatorPlugin):
+    """An authenticator plugin limiting the passwords checked at once.
+    """
+
+    authenticatorPlugin = zope.schema.TextLine(
+        title=_("Authenticator plugin"),
+        description=_("The name of the authenticator plugin whose "
+                      "principals are authenticated. It is looked up in the "
+                      "pluggable authentication utility containing this "
+                      "plugin, or as a utility."),
+        required=True)
+
+    maxConcurrency = zope.schema.Int(
+        title=_("Maximum concurrency"),
+        description=_("The number of passwords checked at the same time."),
+        default=4,
+        min=1,
+        required=True)
+
+    queueTimeout = zope.schema.Float(
+        title=_("Queue timeout"),
+        description=_("The number of seconds to wait for a free slot. "
+                      "Authentication fails if none becomes free in time."),
+        default=5.0,
+        min=0.0,
+        required=True)
+
+
+def pluginKey(plugin):
+    """Return a key identifying a plugin across database connections.
+
+    The copies of a persistent plugin in different connections are the same
+    plugin. Other plugins are identified by the object.
+    """
+    jar = getattr(plugin, '_p_jar', None)
+    oid = getattr(plugin, '_p_oid', None)
+    if jar is not None and oid is not None:
+        return jar.db().database_name, oid
+    return id(plugin)
+
+
+# plugin key -> (maxConcurrency, semaphore)
+_semaphores = {}
+_semaphoresLock = threading.Lock()
+
+
+def getSemaphore(plugin):
+    """Return the semaphore limiting the password checks of `plugin`.
+
+    Every plugin has a semaphore of its own, letting `maxConcurrency`
+    passwords be checked at once:
+
+      >>> plugin = ConcurrencyLimitingAuthenticatorPlugin(maxConcurrency=2)
+      >>> semaphore = getSemaphore(plugin)
+      >>> getSemaphore(plugin) is semaphore
+      True
+      >>> other = ConcurrencyLimitingAuthenticatorPlugin(maxConcurrency=2)
+      >>> getSemaphore(other) is semaphore
+      False
+
+    The copies of a persistent plugin in different database connections
+    share the semaphore, which is replaced when the maximum concurrency
+    changes:
+
+      >>> plugin.maxConcurrency = 3
+      >>> getSemaphore(plugin) is semaphore
+      False
+
+    """
+    key = pluginKey(plugin)
+    size = plugin.maxConcurrency
+    with _semaphoresLock:
+        entry = _semaphores.get(key)
+        if entry is None or entry[0] != size:
+            entry = _semaphores[key] = (
+                size, threading.BoundedSemaphore(size))
+        return entry[1]
+
+
+def clearSemaphores():
+    """Forget the semaphores.
+
+    New ones are created when needed.
+    """
+    with _semaphoresLock:
+        _semaphores.clear()
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(clearSemaphores)
+
+
+@implementer(IConcurrencyLimitingAuthenticatorPlugin, IQuerySchemaSearch)
+class ConcurrencyLimitingAuthenticatorPlugin(persistent.Persistent, Contained):
+    """Check the passwords of another plugin's principals a few at a time.
+
+    See concurrency.rst for details.
+    """
+
+    authenticatorPlugin = None
+    maxConcurrency = 4
+    queueTimeout = 5.0
+
+    def __init__(self, authenticatorPlugin=None, maxConcurrency=4,
+                 queueTimeout=5.0):
+        self.authenticatorPlugin = authenticatorPlugin
+        self.maxConcurrency = maxConcurrency
+        self.queueTimeout = queueTimeout
+
+    def getAuthenticatorPlugin(self):
+        """Return the wrapped authenticator plugin, or None."""
+        name = self.authenticatorPlugin
+        if not name:
+            return None
+        plugin = None
+        if IPluggableAuthentication.providedBy(self.__parent__):
+            plugin = self.__parent__.get(name)
+        if not IAuthenticatorPlugin.providedBy(plugin):
+            plugin = component.queryUtility(
+                IAuthenticatorPlugin, name, context=self)
+        if plugin is self:
+            return None
+        return plugin
+
+    def authenticateCredentials(self, credentials):
+        plugin = self.getAuthenticatorPlugin()
+        if plugin is None:
+            return None
+        if not IInternalPrincipalContainer.providedBy(plugin):
+            # We don't know how other plugins check credentials.
+            return plugin.authenticateCredentials(credentials)
+        if not isinstance(credentials, dict):
+            return None
+        if not ('login' in credentials and 'password' in credentials):
+            return None
+        try:
+            id = plugin.getIdByLogin(credentials['login'])
+        except KeyError:
+            return None
+        internal = plugin[id[len(plugin.prefix):]]
+        if not self.checkPassword(internal, credentials['password']):
+            return None
+        return PrincipalInfo(id, internal.login, internal.title,
+                             internal.description)
+
+    def checkPassword(self, principal, password):
+        """Check the password of an internal principal.
+
+        The password is checked in the calling thread, once fewer than
+        `maxConcurrency` passwords are being checked. Returns False if that
+        doesn't happen within the queue timeout.
+        """
+        semaphore = getSemaphore(self)
+        if not semaphore.acquire(timeout=self.queueTimeout):
+            logger.warning(
+                'No slot became free to check a password within %s seconds',
+                self.queueTimeout)
+            return False
+        try:
+            return principal.checkPassword(password)
+        finally:
+            semaphore.release()
+
+    def principalInfo(self, id):
+        plugin = self.getAuthenticatorPlugin()
+        if plugin is not None:
+            return plugin.principalInfo(id)
+
+    @property
+    def schema(self):
+        plugin = self.getAuthenticatorPlugin()
+        if IQuerySchemaSearch.providedBy(plugin):
+            return plugin.schema
+        return Interface
+
+    def search(self, query, start=None, batch_size=None):
+        plugin = self.getAuthenticatorPlugin()
+        if IQuerySchemaSearch.providedBy(plugin):
+            return plugin.search(query, start, batch_size)
+        return ()
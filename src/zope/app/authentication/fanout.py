@@ -0,0 +1,215 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Search the queriable authenticator plugins of a PAU concurrently
+"""
+__docformat__ = "reStructuredText"
+
+import concurrent.futures
+import functools
+import logging
+import threading
+import time
+
+from zope.pluggableauth.interfaces import IQueriableAuthenticator
+
+from zope import component
+from zope.app.authentication.authentication import QuerySchemaSearchAdapter
+from zope.app.authentication.concurrency import pluginKey
+from zope.app.authentication.interfaces import IConcurrentQuerySchemaSearch
+
+
+logger = logging.getLogger(__name__)
+
+# The number of plugins searched at the same time by all fan-out searches.
+MAX_WORKERS = 8
+
+_executor = None
+_executorLock = threading.Lock()
+
+
+def getExecutor():
+    """Return the executor running the searches of concurrent plugins."""
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                MAX_WORKERS, thread_name_prefix='principal-search')
+        return _executor
+
+
+def shutDownExecutor(wait=False):
+    """Shut down the executor, which is created again when needed.
+
+    Searches still running, such as those that timed out, are left to
+    finish unless `wait` is true.
+    """
+    global _executor
+    with _executorLock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:  # pragma: no cover
+    pass
+else:
+    addCleanUp(shutDownExecutor)
+
+
+# The searches that timed out and are still running, by plugin.  A plugin
+# isn't searched again until its search is done, so that a hung plugin
+# holds a single worker of the pool.
+_hung = {}
+_hungLock = threading.Lock()
+
+
+def _hangs(key, future):
+    with _hungLock:
+        _hung[key] = future
+    future.add_done_callback(lambda future: _recovered(key, future))
+
+
+def _recovered(key, future):
+    with _hungLock:
+        if _hung.get(key) is future:
+            del _hung[key]
+
+
+def _isHung(key):
+    with _hungLock:
+        future = _hung.get(key)
+    return future is not None and not future.done()
+
+
+def queriableAuthenticators(pau):
+    """Return the queriable authenticator plugins of a PAU.
+
+    (name, plugin, queriable) tuples are returned, in the order of the
+    plugins, for the plugins adaptable to `IQueriableAuthenticator`.
+    """
+    for name, plugin in pau.getAuthenticatorPlugins():
+        queriable = component.queryMultiAdapter(
+            (plugin, pau), IQueriableAuthenticator)
+        if queriable is None:
+            continue
+        if isinstance(queriable, QuerySchemaSearchAdapter):
+            queriable.pluginName = name
+        yield name, plugin, queriable
+
+
+def _call(search):
+    # Results are iterated in the worker too, as they may be lazy.
+    return list(search())
+
+
+class FanOut:
+    """The results of calling the searches of several plugins.
+
+    `searches` is an iterable of (name, plugin, search) tuples, where
+    `search` is called without arguments and returns an iterable.  The
+    searches of plugins providing `IConcurrentQuerySchemaSearch` are called
+    in a pool of threads, while the others are called in the calling
+    thread.  Iterating yields (name, results) pairs as the searches
+    return.  Each search has at most `timeout` seconds, from the start, to
+    return.  Once iterated, `timedOut` and `failed` hold the names of the
+    plugins that didn't return in time and that raised errors.
+
+    A plugin whose search timed out earlier and is still running isn't
+    searched again, but counts as timed out right away.
+    """
+
+    def __init__(self, searches, timeout=5.0):
+        self.searches = searches
+        self.timeout = timeout
+        self.timedOut = []
+        self.failed = []
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.timeout
+        executor = getExecutor()
+        futures = {}
+        local = []
+        hung = []
+        for name, plugin, search in self.searches:
+            if not IConcurrentQuerySchemaSearch.providedBy(plugin):
+                local.append((name, search))
+                continue
+            key = pluginKey(plugin)
+            if _isHung(key):
+                hung.append(name)
+                continue
+            futures[executor.submit(_call, search)] = name, key
+        if hung:
+            self.timedOut = hung
+            logger.warning('Not searching %s, whose last search is still '
+                           'running', ', '.join(hung))
+        # The other plugins may use the database connection of this thread.
+        for name, search in local:
+            yield name, search()
+        pending = dict(futures)
+        try:
+            for future in concurrent.futures.as_completed(
+                    futures, max(deadline - time.monotonic(), 0)):
+                name, key = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception:
+                    logger.exception('Searching %s failed', name)
+                    self.failed.append(name)
+                    continue
+                yield name, results
+        except concurrent.futures.TimeoutError:
+            timedOut = []
+            for future, (name, key) in pending.items():
+                if not future.cancel():
+                    _hangs(key, future)
+                timedOut.append(name)
+            self.timedOut = sorted(hung + timedOut)
+            logger.warning('Searching %s took more than %s seconds',
+                           ', '.join(sorted(timedOut)), self.timeout)
+
+
+class FanOutSearchResult(FanOut):
+    """The principal ids found by a fan-out search, as they arrive.
+
+    All the queriable authenticator plugins of the PAU are searched.
+
+    See fanout.rst for details.
+    """
+
+    def __init__(self, pau, query, timeout=5.0, batch_size=None):
+        self.pau = pau
+        self.query = query
+        self.batch_size = batch_size
+        super().__init__(self._searches(), timeout)
+
+    def _searches(self):
+        for name, plugin, queriable in queriableAuthenticators(self.pau):
+            yield name, plugin, functools.partial(
+                queriable.search, self.query, None, self.batch_size)
+
+    def __iter__(self):
+        for name, ids in super().__iter__():
+            yield from ids
+
+
+def fanOutSearch(pau, query, timeout=5.0, batch_size=None):
+    """Search the queriable authenticator plugins of a PAU concurrently.
+
+    Returns a `FanOutSearchResult`, which searches when iterated.
+    `batch_size` limits the number of ids returned by each plugin.
+    """
+    return FanOutSearchResult(pau, query, timeout, batch_size)
@@ -13,6 +13,12 @@
 ##############################################################################
 """Zope Groups Folder implementation."""
 
+import BTrees.OOBTree
+import zope.container.constraints
+from zope.authentication.interfaces import IAuthentication
+from zope.container.btree import BTreeContainer
+from zope.event import notify
+from zope.interface import implementer
 # BBB using zope.pluggableauth.plugin.groupfolder
 from zope.pluggableauth.plugins.groupfolder import GroupCycle
 from zope.pluggableauth.plugins.groupfolder import GroupFolder
@@ -25,7 +31,221 @@ from zope.pluggableauth.plugins.groupfolder import IGroupPrincipalInfo
 from zope.pluggableauth.plugins.groupfolder import IGroupSearchCriteria
 from zope.pluggableauth.plugins.groupfolder import InvalidGroupId
 from zope.pluggableauth.plugins.groupfolder import InvalidPrincipalIds
+from zope.pluggableauth.plugins.groupfolder import PrincipalsAddedToGroup
+from zope.pluggableauth.plugins.groupfolder import PrincipalsRemovedFromGroup
 from zope.pluggableauth.plugins.groupfolder import nocycles
 from zope.pluggableauth.plugins.groupfolder import setGroupsForPrincipal
 from zope.pluggableauth.plugins.groupfolder import setMemberSubscriber
 from zope.pluggableauth.plugins.groupfolder import specialGroups
+
+from zope import component
+
+
+class IIndexedGroupInformation(IGroupInformation):
+    """Group information that can change its members one by one."""
+
+    def addPrincipals(principal_ids):
+        """Add the given principals to the group.
+
+        Principals that already are members are ignored.
+        """
+
+    def removePrincipals(principal_ids):
+        """Remove the given principals from the group.
+
+        Principals that aren't members are ignored.
+        """
+
+
+class IIndexedGroupFolder(IGroupFolder):
+    """A group folder that keeps an index of the groups of its members."""
+
+    zope.container.constraints.contains(IIndexedGroupInformation)
+
+    def getDirectGroupsForPrincipal(principalid):
+        """Get the groups the given principal is a member of.
+
+        This is the same as `getGroupsForPrincipal`.
+        """
+
+    def checkIndex():
+        """Return the ids of the principals whose indexed groups are wrong.
+
+        The groups principals are indexed under are checked against the
+        members of the groups.
+        """
+
+    def rebuildIndex():
+        """Index the groups of all principals from the group members."""
+
+
+@implementer(IIndexedGroupFolder)
+class IndexedGroupFolder(GroupFolder):
+    """A group folder that keeps an index of the groups of its members.
+
+    See groupfolder.rst for details.
+    """
+
+    def __init__(self, prefix=''):
+        # The groups of the members are kept here rather than in the
+        # mapping of `GroupFolder`, which is thus not created.
+        BTreeContainer.__init__(self)
+        self.prefix = prefix
+        # member id -> ids of the groups it is a member of
+        self._groups = BTrees.OOBTree.OOBTree()
+
+    def _authenticationPrefix(self):
+        # Groups of this folder are listed as members by the id the
+        # pluggable-authentication utility gives them.
+        return getattr(self.__parent__, 'prefix', '')
+
+    def _addPrincipalsToGroup(self, principal_ids, group_id):
+        for principal_id in principal_ids:
+            groups = self._groups.get(principal_id, ())
+            if group_id not in groups:
+                self._groups[principal_id] = groups + (group_id,)
+
+    def _removePrincipalsFromGroup(self, principal_ids, group_id):
+        for principal_id in principal_ids:
+            groups = self._groups.get(principal_id, ())
+            if group_id in groups:
+                self._storeGroups(
+                    principal_id,
+                    tuple([id for id in groups if id != group_id]))
+
+    def getGroupsForPrincipal(self, principalid):
+        """Get groups the given principal belongs to"""
+        return self._groups.get(principalid, ())
+
+    getDirectGroupsForPrincipal = getGroupsForPrincipal
+
+    def _storeGroups(self, principal_id, groups):
+        if groups:
+            if self._groups.get(principal_id) != groups:
+                self._groups[principal_id] = groups
+        elif principal_id in self._groups:
+            del self._groups[principal_id]
+
+    def _checkCycles(self, principal_ids, group_id):
+        # Adding members to a group makes a cycle if one of them is the
+        # group itself or one of the groups it belongs to.  These are found
+        # breadth-first through the authentication utility, so that groups
+        # of other plugins are followed too, and each is looked up once:
+        # this costs no more than the number of groups the group belongs
+        # to, however many members it has.
+        getPrincipal = component.getUtility(IAuthentication).getPrincipal
+        start = self._authenticationPrefix() + group_id
+        ancestors = [start]
+        seen = {start}
+        for ancestor in ancestors:
+            for parent_id in getPrincipal(ancestor).groups:
+                if parent_id not in seen:
+                    seen.add(parent_id)
+                    ancestors.append(parent_id)
+        for principal_id in sorted(principal_ids):
+            if principal_id in seen:
+                raise GroupCycle(principal_id, ancestors)
+
+    def _directMapping(self):
+        # The groups of the members, as recorded by the groups themselves.
+        mapping = {}
+        for name, group in self.items():
+            group_id = self._groupid(group)
+            for principal_id in group.principals:
+                mapping.setdefault(principal_id, []).append(group_id)
+        return mapping
+
+    def _expected(self):
+        # The expected groups of every member.
+        mapping = self._directMapping()
+        return [(principal_id, tuple(mapping.get(principal_id, ())))
+                for principal_id in set(mapping).union(self._groups)]
+
+    def checkIndex(self):
+        return sorted(
+            principal_id
+            for principal_id, groups in self._expected()
+            if set(groups) != set(self._groups.get(principal_id, ())))
+
+    def rebuildIndex(self):
+        for principal_id, groups in self._expected():
+            self._storeGroups(principal_id, groups)
+
+
+@implementer(IIndexedGroupInformation)
+class IndexedGroupInformation(GroupInformation):
+    """Group information storing its members in a BTree set.
+
+    Changing the members only writes the changed part of the set, and events
+    are only fired for the principals that were actually added or removed.
+    The members are kept sorted by id.
+
+    See groupfolder.rst for details.
+    """
+
+    def __init__(self, title='', description=''):
+        super().__init__(title, description)
+        self._members = BTrees.OOBTree.OOTreeSet()
+
+    def setPrincipals(self, prinlist, check=True):
+        new = set(prinlist)
+        self._changePrincipals(
+            [id for id in new if id not in self._members],
+            [id for id in self._members if id not in new],
+            check)
+
+    principals = property(lambda self: tuple(self._members), setPrincipals)
+
+    def addPrincipals(self, principal_ids):
+        self._changePrincipals(
+            [id for id in set(principal_ids) if id not in self._members], ())
+
+    def removePrincipals(self, principal_ids):
+        self._changePrincipals(
+            (), [id for id in set(principal_ids) if id in self._members])
+
+    def _changePrincipals(self, added, removed, check=True):
+        for principal_id in removed:
+            self._members.remove(principal_id)
+        for principal_id in added:
+            self._members.insert(principal_id)
+
+        parent = self.__parent__
+        if parent is None:
+            return
+
+        group_id = parent._groupid(self)
+        try:
+            parent._removePrincipalsFromGroup(removed, group_id)
+        except AttributeError:
+            notify_removed = False
+        else:
+            notify_removed = bool(removed)
+        try:
+            parent._addPrincipalsToGroup(added, group_id)
+        except AttributeError:
+            notify_added = False
+        else:
+            notify_added = bool(added)
+
+        if check and added:
+            # Only the new members can introduce a cycle.
+            try:
+                checkCycles = getattr(parent, '_checkCycles', None)
+                if checkCycles is not None:
+                    checkCycles(added, group_id)
+                else:
+                    principalsUtility = component.getUtility(IAuthentication)
+                    nocycles(
+                        sorted(added), [], principalsUtility.getPrincipal)
+            except GroupCycle:
+                # abort
+                self._changePrincipals(removed, added, False)
+                raise
+
+        if notify_removed:
+            notify(PrincipalsRemovedFromGroup(
+                removed, parent.__parent__.prefix + group_id))
+        if notify_added:
+            notify(PrincipalsAddedToGroup(
+                added, parent.__parent__.prefix + group_id))
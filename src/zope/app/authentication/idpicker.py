@@ -13,5 +13,78 @@
 ##############################################################################
 """Helper base class that picks principal ids."""
 
+from BTrees.Length import Length
 # BBB using zope.pluggableauth.plugins.idpicker
 from zope.pluggableauth.plugins.idpicker import IdPicker
+from zope.security.proxy import removeSecurityProxy
+
+
+# The attribute of containers keeping the last numeric id picked.
+MARK = '_idPickerMark'
+
+
+class NumericIdPicker(IdPicker):
+    """An id picker remembering the numeric ids it picked.
+
+    Like `IdPicker`, it picks the first unused number when no name is
+    given:
+
+      >>> from zope.container.btree import BTreeContainer
+      >>> folder = BTreeContainer()
+      >>> folder['2'] = folder['bob'] = object()
+      >>> NumericIdPicker(folder).chooseName('', None)
+      '1'
+
+    but it remembers the last number picked, in the container, and
+    continues from there instead of trying every number from 1 again:
+
+      >>> folder['1'] = object()
+      >>> NumericIdPicker(folder).chooseName('', None)
+      '3'
+      >>> folder['3'] = object()
+      >>> del folder['1']
+      >>> NumericIdPicker(folder).chooseName('', None)
+      '4'
+
+    Numbers of removed principals and groups aren't picked again, so that
+    grants and group memberships left behind for them don't pass to new
+    ones.
+
+    The number is kept in a `BTrees.Length`, which resolves conflicts by
+    adding up the changes of the transactions: each pick advances it by
+    the numbers it went past, so when two transactions pick numbers at the
+    same time, it advances past both, possibly skipping unused numbers, but
+    never goes back.  Two transactions adding the same number conflict in
+    the container.
+
+    Names given are made unique as before:
+
+      >>> NumericIdPicker(folder).chooseName('bob', None)
+      'bob1'
+
+    Containers that can't keep the number, such as mappings, are searched
+    from 1 every time:
+
+      >>> NumericIdPicker({'1': 1}).chooseName('', None)
+      '2'
+
+    """
+
+    def chooseName(self, name, object):
+        if name:
+            return super().chooseName(name, object)
+        container = removeSecurityProxy(self.context)
+        mark = getattr(container, MARK, None)
+        if mark is None:
+            mark = Length()
+            try:
+                setattr(container, MARK, mark)
+            except AttributeError:
+                return super().chooseName(name, object)
+        start = i = mark()
+        while str(i + 1) in container:
+            i += 1
+        name = str(i + 1)
+        mark.change(i + 1 - start)
+        self.checkName(name, object)
+        return name
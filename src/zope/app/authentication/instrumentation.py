@@ -0,0 +1,135 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Statistics of the calls of authentication plugins
+"""
+__docformat__ = "reStructuredText"
+
+import bisect
+import threading
+
+
+# The upper bounds, in seconds, of the buckets of the latency histograms.
+# The last bucket holds the slower calls.
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class CallStatistics:
+    """The statistics of the calls of one method of a plugin.
+
+    Calls are recorded with their duration and whether they found something:
+
+      >>> stats = CallStatistics()
+      >>> stats.record(0.002, True)
+      >>> stats.record(0.004, False)
+      >>> stats.record(2.0, None, error=True)
+      >>> stats.calls, stats.hits, stats.misses, stats.errors
+      (3, 1, 1, 1)
+      >>> round(stats.mean, 3)
+      0.669
+
+    The durations are counted in a histogram whose buckets are bounded by
+    `BUCKETS`:
+
+      >>> stats.histogram
+      [0, 0, 0, 2, 0, 0, 0, 0, 0, 1, 0]
+
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def record(self, seconds, hit, error=False):
+        self.calls += 1
+        if error:
+            self.errors += 1
+        elif hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.seconds += seconds
+        self.histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    @property
+    def mean(self):
+        return self.seconds / self.calls if self.calls else 0.0
+
+    def asDict(self):
+        return {'calls': self.calls,
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'seconds': self.seconds,
+                'histogram': list(self.histogram)}
+
+
+class PluginStatistics:
+    """The statistics of the calls of the plugins of a PAU, by plugin name
+    and method:
+
+      >>> stats = PluginStatistics()
+      >>> stats.record('principals', 'principalInfo', 0.001, True)
+      >>> stats.record('principals', 'principalInfo', 0.003, False)
+      >>> stats.record('basic', 'extractCredentials', 0.0001, True)
+      >>> for (name, method), call in stats.items():
+      ...     print(name, method, call.calls, call.hits)
+      basic extractCredentials 1 1
+      principals principalInfo 2 1
+      >>> stats.get('principals', 'principalInfo').misses
+      1
+      >>> print(stats.get('principals', 'search'))
+      None
+
+      >>> stats.asDict()['principals']['principalInfo']['calls']
+      2
+
+      >>> stats.reset()
+      >>> stats.items()
+      []
+
+    The statistics are kept in memory, per process, and recorded by all the
+    threads using the PAU.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, method, seconds, hit, error=False):
+        with self._lock:
+            stats = self._calls.get((name, method))
+            if stats is None:
+                stats = self._calls[name, method] = CallStatistics()
+            stats.record(seconds, hit, error)
+
+    def get(self, name, method):
+        return self._calls.get((name, method))
+
+    def items(self):
+        with self._lock:
+            return sorted(self._calls.items())
+
+    def asDict(self):
+        result = {}
+        for (name, method), stats in self.items():
+            result.setdefault(name, {})[method] = stats.asDict()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
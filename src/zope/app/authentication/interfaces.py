@@ -42,3 +42,93 @@ from zope.pluggableauth.interfaces import IQuerySchemaSearch
 from zope.pluggableauth.plugins.groupfolder import GroupAdded
 
 from zope.app.authentication.i18n import ZopeMessageFactory as _
+
+
+class IBatchedQuerySchemaSearch(IQuerySchemaSearch):
+    """A schema search whose batches are taken from the matches.
+
+    Plain `IQuerySchemaSearch` plugins are free to interpret the `start` and
+    `batch_size` arguments of `search` as they see fit.  Plugins providing
+    this interface guarantee that `start` is an offset into the sequence of
+    matching principals (not into the underlying storage) and that at most
+    `batch_size` ids are returned, so callers can page through large result
+    sets without walking the matches preceding the requested page.
+    """
+
+    def count(query):
+        """Return the number of principals matching `query`.
+
+        This should be cheaper than iterating the search results, by not
+        producing the ids or loading the principals, but it may still have
+        to look at every match.
+        """
+
+
+class IConcurrentQuerySchemaSearch(IQuerySchemaSearch):
+    """A schema search that may run outside of the request's thread.
+
+    Plugins searching external directories, which don't use the database
+    connection of the request or other state of its thread, can provide
+    this so that fan-out searches run them concurrently with other plugins.
+    """
+
+
+class ICachingPluggableAuthentication(IPluggableAuthentication):
+    """A pluggable authentication utility that caches principals."""
+
+    requestCache = zope.schema.Bool(
+        title=_("Cache principals per request"),
+        description=_("Looking up a principal more than once during a "
+                      "request returns the principal found the first time."),
+        default=True,
+        required=False)
+
+    credentialsCacheSize = zope.schema.Int(
+        title=_("Credentials cache size"),
+        description=_("The number of authenticated credentials to remember. "
+                      "Requests with remembered credentials don't need to "
+                      "be authenticated by the authenticator plugins."),
+        default=1000,
+        min=0,
+        required=False)
+
+    credentialsCacheTimeout = zope.schema.Int(
+        title=_("Credentials cache timeout"),
+        description=_("The number of seconds authenticated credentials are "
+                      "remembered. 0 disables the credentials cache."),
+        default=300,
+        min=0,
+        required=False)
+
+    pluginStatistics = zope.schema.Bool(
+        title=_("Record plugin statistics"),
+        description=_("Count the calls of the plugins, how long they take "
+                      "and whether they find anything."),
+        default=False,
+        required=False)
+
+    adaptivePluginOrder = zope.schema.Bool(
+        title=_("Adaptive plugin order"),
+        description=_("Look principals up first in the authenticator "
+                      "plugins that found principals with similar ids. "
+                      "Credentials are still authenticated in the "
+                      "configured order."),
+        default=False,
+        required=False)
+
+    negativeCacheSize = zope.schema.Int(
+        title=_("Negative cache size"),
+        description=_("The number of principal ids for which to remember "
+                      "the authenticator plugins that don't know them."),
+        default=1000,
+        min=0,
+        required=False)
+
+    negativeCacheTimeout = zope.schema.Int(
+        title=_("Negative cache timeout"),
+        description=_("The number of seconds to remember that authenticator "
+                      "plugins don't know a principal id. 0 disables the "
+                      "negative cache."),
+        default=0,
+        min=0,
+        required=False)
@@ -0,0 +1,167 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Upgrade the password hashes of principals when they log in
+"""
+__docformat__ = "reStructuredText"
+
+import collections
+
+import persistent
+import zope.schema
+from zope.container.contained import Contained
+from zope.interface import Interface
+from zope.interface import implementer
+from zope.password.interfaces import IPasswordManager
+from zope.password.password import BCRYPTKDFPasswordManager
+from zope.pluggableauth.interfaces import IAuthenticatedPrincipalCreated
+
+from zope import component
+from zope.app.authentication.authentication import CREDENTIALS_KEY
+from zope.app.authentication.i18n import ZopeMessageFactory as _
+from zope.app.authentication.principalfolder import principalFolder
+
+
+class IPasswordUpgrade(Interface):
+    """The password manager the passwords of principals are upgraded to.
+
+    When a principal of a principal folder logs in and its password is
+    encoded by another password manager, or with fewer rounds of hashing than
+    the password manager is configured to use, the password is encoded
+    again.
+    """
+
+    passwordManagerName = zope.schema.Choice(
+        title=_("Password Manager"),
+        description=_("The password manager passwords are upgraded to."),
+        vocabulary="Password Manager Names",
+        default="SSHA",
+        required=True)
+
+    def needsUpgrade(principal):
+        """Return whether the password of an internal principal is outdated.
+        """
+
+
+def hashRounds(manager, encoded_password):
+    """Return the rounds of hashing of an encoded password, or None.
+
+    Only some password managers let the rounds be configured and record
+    them in the passwords they encode, in hexadecimal:
+
+      >>> manager = BCRYPTKDFPasswordManager()
+      >>> hashRounds(manager, b'{BCRYPTKDF}33$c2FsdA==$a2V5')
+      51
+      >>> print(hashRounds(manager, '{SSHA}...'))
+      None
+
+      >>> from zope.password.password import SSHAPasswordManager
+      >>> manager = SSHAPasswordManager()
+      >>> print(hashRounds(manager, manager.encodePassword('secret')))
+      None
+
+    """
+    if not isinstance(manager, BCRYPTKDFPasswordManager):
+        return None
+    if isinstance(encoded_password, str):
+        encoded_password = encoded_password.encode('ascii')
+    prefix = b'{BCRYPTKDF}'
+    if not encoded_password.startswith(prefix):
+        return None
+    try:
+        return int(encoded_password[len(prefix):].split(b'$')[0], 16)
+    except ValueError:
+        return None
+
+
+@implementer(IPasswordUpgrade)
+class PasswordUpgrade(persistent.Persistent, Contained):
+    """Upgrade passwords to the configured password manager.
+
+    See passwordupgrade.rst for details.
+    """
+
+    passwordManagerName = "SSHA"
+
+    def __init__(self, passwordManagerName="SSHA"):
+        self.passwordManagerName = passwordManagerName
+
+    def needsUpgrade(self, principal):
+        if principal.passwordManagerName != self.passwordManagerName:
+            return True
+        manager = component.getUtility(
+            IPasswordManager, self.passwordManagerName)
+        rounds = hashRounds(manager, principal.password)
+        return rounds is not None and rounds < manager.rounds
+
+
+@component.adapter(IAuthenticatedPrincipalCreated)
+def upgradePassword(event):
+    """Encode the password of a principal that logged in again if needed.
+
+    The password is taken from the credentials the principal was just
+    authenticated with by a `CachingPluggableAuthentication`. The new
+    password is stored in the transaction of the request.
+    """
+    info = event.info
+    folder = principalFolder(getattr(info, 'authenticatorPlugin', None))
+    if folder is None or not info.id.startswith(folder.prefix):
+        return
+    upgrade = component.queryUtility(IPasswordUpgrade, context=folder)
+    if upgrade is None:
+        return
+    principal = folder.get(info.id[len(folder.prefix):])
+    if principal is None or not upgrade.needsUpgrade(principal):
+        return
+    # The credentials were authenticated by the folder, or cached after
+    # they were, for the current password.
+    credentials = event.request.annotations.get(CREDENTIALS_KEY)
+    if not isinstance(credentials, dict):
+        return
+    password = credentials.get('password')
+    if password is None:
+        return
+    principal.setPassword(password, upgrade.passwordManagerName)
+
+
+def passwordManagerCounts(folder):
+    """Return the number of principals of a folder per password manager.
+
+      >>> from zope.app.authentication.principalfolder import (
+      ...     InternalPrincipal, PrincipalFolder)
+      >>> folder = PrincipalFolder()
+      >>> folder['a'] = InternalPrincipal('a', '', 'A',
+      ...                                 passwordManagerName='Plain Text')
+      >>> folder['b'] = InternalPrincipal('b', '', 'B',
+      ...                                 passwordManagerName='Plain Text')
+      >>> folder['c'] = InternalPrincipal('c', '', 'C',
+      ...                                 passwordManagerName='MD5')
+      >>> passwordManagerCounts(folder)
+      [('MD5', 1), ('Plain Text', 2)]
+
+    """
+    counts = collections.Counter(
+        principal.passwordManagerName for principal in folder.values())
+    return sorted(counts.items())
+
+
+def outdatedPasswordCount(folder, upgrade=None):
+    """Return how many principals of a folder have outdated passwords.
+
+    The passwords are compared with the `IPasswordUpgrade` utility of the
+    folder unless one is passed.
+    """
+    if upgrade is None:
+        upgrade = component.getUtility(IPasswordUpgrade, context=folder)
+    return sum(1 for principal in folder.values()
+               if upgrade.needsUpgrade(principal))
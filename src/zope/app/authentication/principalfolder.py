@@ -13,6 +13,14 @@
 ##############################################################################
 """ZODB-based Authentication Source"""
 
+import itertools
+
+import BTrees.OOBTree
+from zope.interface import implementer
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+from zope.password.interfaces import IMatchingPasswordManager
+from zope.password.interfaces import IPasswordManager
+from zope.password.password import PlainTextPasswordManager
 from zope.pluggableauth.factories import AuthenticatedPrincipalFactory
 from zope.pluggableauth.factories import FoundPrincipalFactory
 from zope.pluggableauth.factories import Principal
@@ -28,3 +36,239 @@ from zope.pluggableauth.plugins.principalfolder import \
 from zope.pluggableauth.plugins.principalfolder import InternalPrincipal
 from zope.pluggableauth.plugins.principalfolder import ISearchSchema
 from zope.pluggableauth.plugins.principalfolder import PrincipalFolder
+
+from zope import component
+from zope.app.authentication.concurrency import \
+    IConcurrencyLimitingAuthenticatorPlugin
+from zope.app.authentication.interfaces import IBatchedQuerySchemaSearch
+
+
+class IIndexedInternalPrincipalContainer(IInternalPrincipalContainer):
+    """An internal principal container that indexes its principals."""
+
+    def reindexPrincipal(id):
+        """Update the search index for the principal stored under `id`.
+
+        This is done automatically when principals are added, removed or
+        modified (as announced by an `IObjectModifiedEvent`), and only needs
+        to be called after changing a principal's title or description
+        without notifying.
+        """
+
+
+def _grams(text):
+    """Return the grams of a (lowercase) text, its short substrings.
+
+    Grams are up to three characters long:
+
+      >>> sorted(_grams('log'))
+      ['g', 'l', 'lo', 'log', 'o', 'og']
+      >>> sorted(_grams(''))
+      []
+
+    Search strings of up to three characters are thus grams themselves, and
+    the principals having a gram are exactly the principals matching it.
+    """
+    return {text[i:i + n]
+            for n in (1, 2, 3) for i in range(len(text) - n + 1)}
+
+
+@implementer(IIndexedInternalPrincipalContainer, IBatchedQuerySchemaSearch)
+class IndexedPrincipalFolder(PrincipalFolder):
+    """A principal folder that searches its principals using an index.
+
+    See principalfolder.rst for details.
+    """
+
+    def __init__(self, prefix=''):
+        super().__init__(prefix)
+        # principal name -> lowercase title, description and login
+        self._texts = BTrees.OOBTree.OOBTree()
+        # gram -> names of the principals having it in one of the texts
+        self._grams = BTrees.OOBTree.OOBTree()
+
+    def __setitem__(self, id, principal):
+        super().__setitem__(id, principal)
+        self.reindexPrincipal(id)
+
+    def __delitem__(self, id):
+        super().__delitem__(id)
+        self._unindex(id)
+
+    def notifyLoginChanged(self, oldLogin, principal):
+        super().notifyLoginChanged(oldLogin, principal)
+        self.reindexPrincipal(principal.__name__)
+
+    def reindexPrincipal(self, id):
+        self._unindex(id)
+        principal = self[id]
+        texts = tuple(
+            str(text).lower() if text is not None else ''
+            for text in (getattr(principal, 'title', None),
+                         getattr(principal, 'description', None),
+                         getattr(principal, 'login', None)))
+        self._texts[id] = texts
+        for gram in set().union(*map(_grams, texts)):
+            names = self._grams.get(gram)
+            if names is None:
+                names = self._grams[gram] = BTrees.OOBTree.OOTreeSet()
+            names.insert(id)
+
+    def _unindex(self, id):
+        texts = self._texts.get(id)
+        if texts is None:
+            return
+        del self._texts[id]
+        for gram in set().union(*map(_grams, texts)):
+            names = self._grams[gram]
+            names.remove(id)
+            if not names:
+                del self._grams[gram]
+
+    def _exact(self, search):
+        # The names of the principals matching a search string of up to
+        # three characters, as a set, in key order.
+        if not search:
+            return self._texts
+        return self._grams.get(search, ())
+
+    def _candidates(self, search):
+        # Names of the principals that may match a longer search string, in
+        # key order.
+        sets = []
+        for gram in {search[i:i + 3] for i in range(len(search) - 2)}:
+            names = self._grams.get(gram)
+            if names is None:
+                return ()
+            sets.append(names)
+        sets.sort(key=len)
+        result = sets[0]
+        for names in sets[1:]:
+            result = BTrees.OOBTree.intersection(result, names)
+            if not result:
+                break
+        return result
+
+    def _matches(self, query):
+        search = query['search'].lower()
+        texts = self._texts
+        for name in self._candidates(search):
+            # The grams only narrow the search down; check the candidates
+            # against the indexed texts, which doesn't load the principals.
+            if any(search in text for text in texts[name]):
+                yield name
+
+    def search(self, query, start=None, batch_size=None):
+        """Search through this principal provider.
+
+        Unlike `PrincipalFolder.search`, `start` and `batch_size` select a
+        batch of the matching principals.
+        """
+        search = query.get('search')
+        if search is None:
+            return
+        start = start or 0
+        stop = None
+        if batch_size is not None:
+            stop = start + batch_size
+        if len(search) <= 3:
+            names = self._exact(search.lower())
+            # The batch is taken from the index without walking the
+            # matches before it.
+            names = names.keys()[start:stop] if names else ()
+        else:
+            names = itertools.islice(self._matches(query), start, stop)
+        for name in names:
+            yield self.prefix + name
+
+    def count(self, query):
+        """Count the principals matching `query`.
+
+        Search strings of up to three characters are counted from the
+        index; longer ones are checked against the indexed texts of the
+        candidates, without loading the principals.
+        """
+        search = query.get('search')
+        if search is None:
+            return 0
+        if len(search) <= 3:
+            return len(self._exact(search.lower()))
+        return sum(1 for name in self._matches(query))
+
+
+@component.adapter(IInternalPrincipal, IObjectModifiedEvent)
+def reindexModifiedPrincipal(principal, event):
+    """Keep the index of an indexed principal folder up to date."""
+    folder = principal.__parent__
+    if IIndexedInternalPrincipalContainer.providedBy(folder):
+        folder.reindexPrincipal(principal.__name__)
+
+
+def setEncodedPassword(principal, password, passwordManagerName):
+    """Set the password of an internal principal, encoded already.
+
+    Setting the `password` of a principal encodes it, which most password
+    managers make slow on purpose. Passwords copied from another principal
+    folder are encoded already, and are stored as they are:
+
+      >>> principal = InternalPrincipal(
+      ...     'bob', '', 'Bob', passwordManagerName='Plain Text')
+      >>> encoded = InternalPrincipal(
+      ...     'alice', 'secret', 'Alice', passwordManagerName='SHA1').password
+      >>> setEncodedPassword(principal, encoded, 'SHA1')
+      >>> principal.passwordManagerName
+      'SHA1'
+      >>> principal.checkPassword('secret')
+      True
+
+    The password must have been encoded by the password manager, as far as
+    the manager can tell. Plain text passwords are their own encoding, which
+    no password manager recognizes, and are taken as they are:
+
+      >>> setEncodedPassword(principal, 'secret', 'SHA1')
+      Traceback (most recent call last):
+      ...
+      ValueError: The password of bob is not encoded with SHA1
+      >>> setEncodedPassword(principal, 'secret', 'Plain Text')
+      >>> principal.checkPassword('secret')
+      True
+
+    """
+    manager = component.getUtility(IPasswordManager, passwordManagerName)
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    # Other password managers derive from the plain text one.
+    if type(manager) is not PlainTextPasswordManager:
+        if not (IMatchingPasswordManager.providedBy(manager)
+                and manager.match(password)):
+            raise ValueError('The password of %s is not encoded with %s'
+                             % (principal.login, passwordManagerName))
+    # `InternalPrincipal` has no way of storing a password it didn't
+    # encode itself.
+    principal._passwordManagerName = passwordManagerName
+    principal._password = password
+
+
+def principalFolder(plugin):
+    """Return the principal folder of an authenticator plugin, or None.
+
+    Concurrency limiting plugins are unwrapped:
+
+      >>> folder = PrincipalFolder()
+      >>> principalFolder(folder) is folder
+      True
+      >>> from zope.app.authentication.concurrency import (
+      ...     ConcurrencyLimitingAuthenticatorPlugin)
+      >>> plugin = ConcurrencyLimitingAuthenticatorPlugin('principals')
+      >>> plugin.getAuthenticatorPlugin = lambda: folder
+      >>> principalFolder(plugin) is folder
+      True
+      >>> print(principalFolder(None))
+      None
+
+    """
+    if IConcurrencyLimitingAuthenticatorPlugin.providedBy(plugin):
+        plugin = plugin.getAuthenticatorPlugin()
+    if IInternalPrincipalContainer.providedBy(plugin):
+        return plugin
+    return None
@@ -14,8 +14,234 @@
 """ Implementations of the session-based and cookie-based extractor and
     challenge plugins."""
 
+import time
+import zlib
+
+import persistent
+import transaction
+import zope.location
+from zope.interface import implementer
 # BBB
 from zope.pluggableauth.plugins.session import IBrowserFormChallenger
 from zope.pluggableauth.plugins.session import ISessionCredentials
 from zope.pluggableauth.plugins.session import SessionCredentials
 from zope.pluggableauth.plugins.session import SessionCredentialsPlugin
+from zope.publisher.interfaces.http import IHTTPRequest
+from zope.session.interfaces import ISession
+from zope.session.interfaces import ISessionDataContainer
+from zope.session.session import PersistentSessionDataContainer
+
+
+# The session package the credentials are stored in, as by
+# `SessionCredentialsPlugin`.
+SESSION_KEY = 'zope.pluggableauth.browserplugins'
+
+
+@implementer(ISessionCredentials)
+class ResolvingSessionCredentials(persistent.Persistent):
+    """Session credentials whose write conflicts are resolved.
+
+    The credentials are stored once in the session, and changed in place
+    afterwards.  When two transactions change them concurrently, the
+    credentials set last win:
+
+      >>> credentials = ResolvingSessionCredentials()
+      >>> credentials.update('bob', 'secret')
+      True
+      >>> credentials.getLogin(), credentials.getPassword()
+      ('bob', 'secret')
+
+    Setting the same credentials again doesn't change anything:
+
+      >>> credentials.update('bob', 'secret')
+      False
+
+      >>> old = {'login': None, 'password': None, 'modified': 0}
+      >>> saved = {'login': 'bob', 'password': 'a', 'modified': 2}
+      >>> new = {'login': 'bob', 'password': 'b', 'modified': 1}
+      >>> credentials._p_resolveConflict(old, saved, new)['password']
+      'a'
+      >>> credentials._p_resolveConflict(old, new, saved)['password']
+      'a'
+
+    Cleared credentials are false:
+
+      >>> credentials.clear()
+      >>> bool(credentials)
+      False
+
+    """
+
+    login = None
+    password = None
+    modified = 0
+
+    def __init__(self, login=None, password=None):
+        if login is not None:
+            self.update(login, password)
+
+    def getLogin(self):
+        return self.login
+
+    def getPassword(self):
+        return self.password
+
+    def update(self, login, password):
+        """Set the credentials, returning whether they changed."""
+        if (login, password) == (self.login, self.password):
+            return False
+        self.login = login
+        self.password = password
+        self.modified = time.time()
+        return True
+
+    def clear(self):
+        self.update(None, None)
+
+    def __bool__(self):
+        return self.login is not None
+
+    def _p_resolveConflict(self, oldState, savedState, newState):
+        if savedState.get('modified', 0) > newState.get('modified', 0):
+            return savedState
+        return newState
+
+
+class ConflictResolvingSessionCredentialsPlugin(SessionCredentialsPlugin):
+    """A session credentials plugin resolving conflicting credentials.
+
+    Once a session has credentials, logging in and out changes them in
+    place, and concurrent changes are resolved instead of conflicting.
+    The session data is still written by the first login of a session.
+
+    See session.rst for details.
+    """
+
+    def extractCredentials(self, request):
+        """Extracts credentials from the request or the session."""
+        if not IHTTPRequest.providedBy(request):
+            return None
+        session = ISession(request)
+        sessionData = session.get(SESSION_KEY)
+        login = request.get(self.loginfield, None)
+        password = request.get(self.passwordfield, None)
+        if login and password:
+            if sessionData is None:
+                sessionData = session[SESSION_KEY]
+            credentials = sessionData.get('credentials')
+            if isinstance(credentials, ResolvingSessionCredentials):
+                credentials.update(login, password)
+            else:
+                sessionData['credentials'] = ResolvingSessionCredentials(
+                    login, password)
+            return {'login': login, 'password': password}
+        if not sessionData:
+            return None
+        credentials = sessionData.get('credentials')
+        if not credentials:
+            return None
+        return {'login': credentials.getLogin(),
+                'password': credentials.getPassword()}
+
+    def logout(self, request):
+        """Performs logout by clearing session data credentials."""
+        if not IHTTPRequest.providedBy(request):
+            return False
+        sessionData = ISession(request).get(SESSION_KEY)
+        if sessionData:
+            credentials = sessionData.get('credentials')
+            if isinstance(credentials, ResolvingSessionCredentials):
+                credentials.clear()
+            elif credentials is not None:
+                sessionData['credentials'] = None
+        transaction.commit()
+        return True
+
+
+@implementer(ISessionDataContainer)
+class ShardedSessionDataContainer(zope.location.Location,
+                                  persistent.Persistent):
+    """A session data container spreading the sessions over several others.
+
+    Every client id is kept by one of a number of persistent session data
+    containers, picked by a checksum of the id, so that sessions created
+    at the same time are mostly added to different BTrees:
+
+      >>> container = ShardedSessionDataContainer(shards=4)
+      >>> len(container.shards)
+      4
+      >>> from zope.session.session import SessionData
+      >>> container['bob'] = data = SessionData()
+      >>> container['bob'] is data
+      True
+      >>> 'bob' in container
+      True
+      >>> container.get('alice') is None
+      True
+      >>> [len(shard.data) for shard in container.shards].count(1)
+      1
+      >>> del container['bob']
+      >>> 'bob' in container
+      False
+
+    The timeout and resolution apply to all the shards:
+
+      >>> container.timeout = 600
+      >>> container.resolution = 60
+      >>> {(shard.timeout, shard.resolution) for shard in container.shards}
+      {(600, 60)}
+
+    See session.rst for details.
+    """
+
+    def __init__(self, shards=16):
+        self.shards = tuple(PersistentSessionDataContainer()
+                            for i in range(shards))
+        for shard in self.shards:
+            shard.__parent__ = self
+
+    def _shard(self, client_id):
+        # A checksum rather than `hash`, which differs between processes.
+        checksum = zlib.crc32(client_id.encode('utf-8'))
+        return self.shards[checksum % len(self.shards)]
+
+    def _getTimeout(self):
+        return self.shards[0].timeout
+
+    def _setTimeout(self, timeout):
+        for shard in self.shards:
+            shard.timeout = timeout
+
+    timeout = property(_getTimeout, _setTimeout)
+
+    def _getResolution(self):
+        return self.shards[0].resolution
+
+    def _setResolution(self, resolution):
+        for shard in self.shards:
+            shard.resolution = resolution
+
+    resolution = property(_getResolution, _setResolution)
+
+    def __getitem__(self, client_id):
+        return self._shard(client_id)[client_id]
+
+    def get(self, client_id, default=None):
+        try:
+            return self[client_id]
+        except KeyError:
+            return default
+
+    def __contains__(self, client_id):
+        return client_id in self._shard(client_id)
+
+    def __setitem__(self, client_id, session_data):
+        self._shard(client_id)[client_id] = session_data
+
+    def __delitem__(self, client_id):
+        del self._shard(client_id)[client_id]
+
+    def sweep(self):
+        """Clean out stale data from all the shards."""
+        for shard in self.shards:
+            shard.sweep()
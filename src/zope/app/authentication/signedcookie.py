@@ -0,0 +1,224 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Credentials plugin keeping signed, expiring tokens in cookies
+"""
+__docformat__ = "reStructuredText"
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import time
+
+import zope.schema
+from zope.interface import implementer
+from zope.pluggableauth.interfaces import IAuthenticatedPrincipalCreated
+from zope.pluggableauth.interfaces import IAuthenticatorPlugin
+from zope.pluggableauth.interfaces import ICredentialsPlugin
+from zope.pluggableauth.interfaces import IPluggableAuthentication
+from zope.pluggableauth.plugins.session import IBrowserFormChallenger
+from zope.pluggableauth.plugins.session import SessionCredentialsPlugin
+from zope.publisher.interfaces.http import IHTTPRequest
+
+from zope import component
+from zope.app.authentication.i18n import ZopeMessageFactory as _
+
+
+class ISignedCookieCredentialsPlugin(ICredentialsPlugin,
+                                     IAuthenticatorPlugin,
+                                     IBrowserFormChallenger):
+    """Keep the principals that logged in in signed cookies.
+
+    The plugin is both a credentials plugin and an authenticator plugin:
+    the principals of the tokens it extracts are authenticated by itself,
+    and looked up in the other authenticator plugins of its PAU.
+    """
+
+    cookieName = zope.schema.ASCIILine(
+        title=_("Cookie name"),
+        description=_("The name of the cookie holding the token."),
+        default='zope.pluggableauth.token',
+        required=True)
+
+    tokenLifetime = zope.schema.Int(
+        title=_("Token lifetime"),
+        description=_("The number of seconds after which principals must "
+                      "log in again."),
+        default=8 * 3600,
+        min=1,
+        required=True)
+
+    keyCount = zope.schema.Int(
+        title=_("Key count"),
+        description=_("The number of signing keys kept when a new key is "
+                      "made. Tokens signed with older keys are rejected."),
+        default=2,
+        min=1,
+        required=True)
+
+    def makeToken(principalId, issued=None):
+        """Return a token for a principal id, signed with the newest key.
+
+        The id is the one returned by the authenticator plugin, without the
+        prefix of the PAU.
+        """
+
+    def verifyToken(token):
+        """Return the `TokenCredentials` of a token, or None.
+
+        None is returned if the token is malformed, expired, or not signed
+        with one of the keys.
+        """
+
+    def rotateKey():
+        """Make a new signing key, forgetting the oldest ones."""
+
+
+class TokenCredentials:
+    """The credentials of a verified token."""
+
+    def __init__(self, principalId, issued, expires):
+        self.principalId = principalId
+        self.issued = issued
+        self.expires = expires
+
+    def __repr__(self):
+        return 'TokenCredentials(%r)' % self.principalId
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+@implementer(ISignedCookieCredentialsPlugin)
+class SignedCookieCredentialsPlugin(SessionCredentialsPlugin):
+    """Keep signed tokens in cookies instead of credentials in sessions.
+
+    See signedcookie.rst for details.
+    """
+
+    cookieName = 'zope.pluggableauth.token'
+    tokenLifetime = 8 * 3600
+    keyCount = 2
+
+    def __init__(self):
+        self.keys = ()
+        self.rotateKey()
+
+    def rotateKey(self):
+        self.keys = ((os.urandom(32),) + self.keys)[:self.keyCount]
+
+    def _signature(self, key, payload):
+        return _encode(hmac.new(key, payload, hashlib.sha256).digest())
+
+    def makeToken(self, principalId, issued=None):
+        if issued is None:
+            issued = int(time.time())
+        payload = _encode(json.dumps(
+            [principalId, issued, issued + self.tokenLifetime],
+            separators=(',', ':')).encode('utf-8'))
+        signature = self._signature(self.keys[0], payload)
+        return (payload + b'.' + signature).decode('ascii')
+
+    def verifyToken(self, token):
+        try:
+            payload, signature = token.encode('ascii').split(b'.')
+        except (UnicodeError, ValueError):
+            return None
+        if not any(hmac.compare_digest(self._signature(key, payload),
+                                       signature)
+                   for key in self.keys):
+            return None
+        try:
+            principalId, issued, expires = json.loads(_decode(payload))
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        if expires <= time.time():
+            return None
+        return TokenCredentials(principalId, issued, expires)
+
+    def extractCredentials(self, request):
+        """Extract credentials from the login form, or a token."""
+        if not IHTTPRequest.providedBy(request):
+            return None
+        login = request.get(self.loginfield, None)
+        password = request.get(self.passwordfield, None)
+        if login and password:
+            return {'login': login, 'password': password}
+        token = request.getCookies().get(self.cookieName)
+        if not token:
+            return None
+        return self.verifyToken(token)
+
+    def authenticateCredentials(self, credentials):
+        """Authenticate the principal of a verified token."""
+        if not isinstance(credentials, TokenCredentials):
+            return None
+        pau = self.__parent__
+        if not IPluggableAuthentication.providedBy(pau):
+            return None
+        for name, plugin in pau.getAuthenticatorPlugins():
+            if plugin is self:
+                continue
+            info = plugin.principalInfo(credentials.principalId)
+            if info is not None:
+                return info
+        return None
+
+    def principalInfo(self, id):
+        return None
+
+    def setToken(self, request, principalId):
+        """Set the cookie of a new token on the response to `request`."""
+        request.response.setCookie(
+            self.cookieName, self.makeToken(principalId), path='/',
+            max_age=self.tokenLifetime, httponly=True,
+            secure=request.getURL().startswith('https:'))
+
+    def logout(self, request):
+        """Log out by expiring the cookie.
+
+        The token itself stays valid until it expires, or until its key is
+        rotated out.
+        """
+        if not IHTTPRequest.providedBy(request):
+            return False
+        request.response.expireCookie(self.cookieName, path='/')
+        return True
+
+
+@component.adapter(IAuthenticatedPrincipalCreated)
+def setToken(event):
+    """Give principals that logged in with a form a token.
+
+    Tokens that are past half their lifetime are renewed as well, so that
+    active principals stay logged in.
+    """
+    info = event.info
+    plugin = getattr(info, 'credentialsPlugin', None)
+    if not isinstance(plugin, SignedCookieCredentialsPlugin):
+        return
+    credentials = plugin.extractCredentials(event.request)
+    if isinstance(credentials, TokenCredentials):
+        if credentials.expires - time.time() > plugin.tokenLifetime / 2:
+            return
+    elif not isinstance(credentials, dict):
+        return
+    plugin.setToken(event.request, info.id)
@@ -13,7 +13,10 @@
 ##############################################################################
 """Pluggable Authentication Service Tests
 """
+import contextlib
 import doctest
+import io
+import json
 import re
 import unittest
 
@@ -61,6 +64,7 @@ from zope.traversing import api as traversing
 from zope.traversing.interfaces import ITraversable
 
 from zope import component
+from zope.app.authentication import fanout
 
 
 def setUpTraversal():
@@ -126,6 +130,12 @@ def siteTearDown(test):
     placefulTearDown()
 
 
+def fanOutTearDown(test):
+    # Wait for the searches of the pool, so that no thread is left behind.
+    fanout.shutDownExecutor(wait=True)
+    siteTearDown(test)
+
+
 def nonHTTPSessionTestCaseSetUp(sdc_class=PersistentSessionDataContainer):
     # I am getting an error with ClientId and not TestClientId
     setUp()
@@ -169,6 +179,34 @@ class TestPlacesssetup(unittest.TestCase):
         placelesssetup.PlacelessSetup().setUp()
 
 
+class TestBenchmark(unittest.TestCase):
+
+    def test_group_edits(self):
+        from zope.app.authentication import benchmark
+        from zope.app.authentication import groupfolder
+        built, edited = benchmark.benchmarkGroupEdits(
+            groupfolder.IndexedGroupFolder,
+            groupfolder.IndexedGroupInformation,
+            groups=40, fanout=3, edits=5)
+        self.assertGreater(built, 0)
+        self.assertGreater(edited, 0)
+
+    def test_json(self):
+        from zope.app.authentication import benchmark
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            benchmark.main(['--json', '--principals', '20', '--depth', '2',
+                            '--number', '2', '--groups', '20', '--edits',
+                            '2'])
+        results = json.loads(stdout.getvalue())['results']
+        self.assertEqual(
+            sorted({entry['benchmark'] for entry in results}),
+            ['authenticate', 'credentials', 'group-build', 'group-edit',
+             'groups', 'search', 'views'])
+        for entry in results:
+            self.assertGreater(entry['seconds'], 0)
+
+
 @implementer(IBrowserPublisher)
 class ManagementViewSelector(BrowserView):
     """View that selects the first available management view.
@@ -226,6 +264,14 @@ def test_suite():
     flags = doctest.NORMALIZE_WHITESPACE | doctest.ELLIPSIS
     return unittest.TestSuite((
         doctest.DocTestSuite('zope.app.authentication.interfaces'),
+        doctest.DocTestSuite('zope.app.authentication.authentication',
+                             setUp=setUp,
+                             tearDown=tearDown),
+        doctest.DocTestSuite('zope.app.authentication.cache',
+                             setUp=setUp,
+                             tearDown=tearDown),
+        doctest.DocTestSuite('zope.app.authentication.benchmark',
+                             optionflags=flags),
         doctest.DocTestSuite('zope.app.authentication.password'),
         doctest.DocTestSuite('zope.app.authentication.generic'),
         doctest.DocTestSuite('zope.app.authentication.httpplugins'),
@@ -242,6 +288,10 @@ def test_suite():
                              setUp=setUp,
                              tearDown=tearDown),
         doctest.DocTestSuite('zope.app.authentication.idpicker'),
+        doctest.DocTestSuite('zope.app.authentication.instrumentation'),
+        doctest.DocTestSuite('zope.app.authentication.concurrency',
+                             setUp=setUp,
+                             tearDown=tearDown),
         doctest.DocTestSuite('zope.app.authentication.session',
                              optionflags=flags,
                              checker=checker,
@@ -258,6 +308,11 @@ def test_suite():
                                     'getEvents': getEvents,
                                     'clearEvents': clearEvents,
                                     }),
+        doctest.DocFileSuite('caching.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker),
         doctest.DocFileSuite('groupfolder.rst',
                              setUp=setUp,
                              tearDown=tearDown,
@@ -270,6 +325,46 @@ def test_suite():
                              optionflags=flags,
                              checker=checker,
                              ),
+        doctest.DocFileSuite('concurrency.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
+        doctest.DocTestSuite('zope.app.authentication.passwordupgrade',
+                             setUp=setUp,
+                             tearDown=tearDown),
+        doctest.DocFileSuite('passwordupgrade.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
+        doctest.DocFileSuite('fanout.rst',
+                             setUp=siteSetUp,
+                             tearDown=fanOutTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
+        doctest.DocFileSuite('session.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
+        doctest.DocFileSuite('signedcookie.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
+        doctest.DocTestSuite('zope.app.authentication.bulk'),
+        doctest.DocFileSuite('bulk.rst',
+                             setUp=siteSetUp,
+                             tearDown=siteTearDown,
+                             optionflags=flags,
+                             checker=checker,
+                             ),
         unittest.defaultTestLoader.loadTestsFromName(__name__)
     ))
 
@@ -19,15 +19,18 @@ This vocabulary provides terms for authentication utility plugins.
 __docformat__ = "reStructuredText"
 
 import base64
+import functools
 
 import zope.dublincore.interfaces
 from zope.pluggableauth import interfaces
 from zope.schema import vocabulary
 from zope.schema.interfaces import IVocabularyFactory
+from zope.security.proxy import removeSecurityProxy
 
 from zope import component
 from zope import i18n
 from zope import interface
+from zope.app.authentication.cache import registrationState
 from zope.app.authentication.i18n import ZopeMessageFactory as _
 
 
@@ -42,6 +45,12 @@ MISSING_TITLE = _(
     '${name} (not found; deselecting will remove)')
 
 
+@functools.lru_cache(maxsize=10000)
+def _token(name):
+    return base64.b64encode(
+        name.encode('utf-8') if not isinstance(name, bytes) else name).strip()
+
+
 def _pluginVocabulary(context, interface, attr_name):
     """Vocabulary that provides names of plugins of a specified interface.
 
@@ -57,47 +66,87 @@ def _pluginVocabulary(context, interface, attr_name):
 
     The vocabulary also includes the current values of the PAU even if they do
     not correspond to a contained or utility plugin.
+
+    The vocabulary of a PAU is computed once and kept on the PAU until its
+    plugins or their titles, its `attr_name` or the component registrations
+    change.
     """
-    terms = {}
     isPAU = interfaces.IPluggableAuthentication.providedBy(context)
-    if isPAU:
-        for k, v in context.items():
-            if interface.providedBy(v):
-                dc = zope.dublincore.interfaces.IDCDescriptiveProperties(
-                    v, None)
-                if dc is not None and dc.title:
-                    title = dc.title
-                else:
-                    title = k
-                terms[k] = vocabulary.SimpleTerm(
-                    k,
-                    base64.b64encode(
-                        k.encode('utf-8')
-                        if not isinstance(k, bytes)
-                        else k).strip(),
-                    i18n.Message(CONTAINED_TITLE, mapping={'name': title}))
+    if not isPAU:
+        return _computePluginVocabulary(context, interface, attr_name, ())
+
+    # The titles are part of the state, so that the vocabularies kept in
+    # other database connections notice them changing too.
+    contained = _containedPlugins(context, interface)
+    state = (registrationState(context),
+             contained,
+             tuple(getattr(context, attr_name)))
+    # The cache only holds names and titles the caller can see anyway.
+    pau = removeSecurityProxy(context)
+    cache = getattr(pau, '_v_pluginVocabularies', None)
+    if cache is None:
+        cache = pau._v_pluginVocabularies = {}
+    cached = cache.get((interface, attr_name))
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    vocab = _computePluginVocabulary(context, interface, attr_name, contained)
+    cache[interface, attr_name] = state, vocab
+    return vocab
+
+
+def _containedPlugins(context, interface):
+    # The names and titles of the plugins contained in a PAU.
+    plugins = []
+    for k, v in context.items():
+        if interface.providedBy(v):
+            dc = zope.dublincore.interfaces.IDCDescriptiveProperties(v, None)
+            if dc is not None and dc.title:
+                title = dc.title
+            else:
+                title = k
+            plugins.append((k, title))
+    return tuple(plugins)
+
+
+def _computePluginVocabulary(context, interface, attr_name, contained):
+    terms = {}
+    for k, title in contained:
+        terms[k] = vocabulary.SimpleTerm(
+            k, _token(k),
+            i18n.Message(CONTAINED_TITLE, mapping={'name': title}))
     utils = component.getUtilitiesFor(interface, context)
     for nm, _util in utils:
         if nm not in terms:
             terms[nm] = vocabulary.SimpleTerm(
-                nm,
-                base64.b64encode(nm.encode('utf-8')
-                                 if not isinstance(nm, bytes) else nm).strip(),
+                nm, _token(nm),
                 i18n.Message(UTILITY_TITLE, mapping={'name': nm}))
-    if isPAU:
+    if interfaces.IPluggableAuthentication.providedBy(context):
         for nm in set(getattr(context, attr_name)):
             if nm not in terms:
                 terms[nm] = vocabulary.SimpleTerm(
-                    nm,
-                    base64.b64encode(
-                        nm.encode('utf-8')
-                        if not isinstance(nm, bytes)
-                        else nm).strip(),
+                    nm, _token(nm),
                     i18n.Message(MISSING_TITLE, mapping={'name': nm}))
     return vocabulary.SimpleVocabulary(
         [term for nm, term in sorted(terms.items())])
 
 
+def invalidatePluginVocabularies(obj, event):
+    """Forget the plugin vocabularies of a PAU when it or a plugin changes.
+
+    This is registered for modified PAUs and plugins.  The vocabularies
+    kept in other database connections are computed again when they find
+    the plugins, their titles or the selected plugins changed.
+    """
+    if interfaces.IPluggableAuthentication.providedBy(obj):
+        pau = obj
+    else:
+        pau = getattr(obj, '__parent__', None)
+        if not interfaces.IPluggableAuthentication.providedBy(pau):
+            return
+    if getattr(pau, '_v_pluginVocabularies', None):
+        pau._v_pluginVocabularies = {}
+
+
 def authenticatorPlugins(context):
     return _pluginVocabulary(
         context, interfaces.IAuthenticatorPlugin, 'authenticatorPlugins')